@@ -1,13 +1,14 @@
 from fastapi import APIRouter, Request, Form, Depends, status, UploadFile, HTTPException, FastAPI
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import RedirectResponse, StreamingResponse
+from fastapi.responses import RedirectResponse, StreamingResponse, FileResponse, Response
+from sqlalchemy import select
 from sqlalchemy.orm import Session
-from database import get_db, get_all_employees  
+from sqlalchemy.ext.asyncio import AsyncSession
+from database import get_db, get_async_db, SessionLocal
 from models import User, UserRole, Employee, StatusEnum
-from utils import hash_password, verify_password, STATIC_PATHS, get_daily_quote, require_roles, get_current_user, ALLOWED_CONTENT_TYPES, MAX_FILE_SIZE, money, breakup_salary, generate_pdf, create_audit_log, ask_chatgpt
-from datetime import date
+from utils import STATIC_PATHS, require_roles, get_current_user, ALLOWED_CONTENT_TYPES, MAX_FILE_SIZE, money, breakup_salary, SALARY_RULES_VERSION
+from datetime import date, datetime
 import os
-import uuid
 from decimal import Decimal
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
@@ -18,18 +19,40 @@ from sqlalchemy.exc import SQLAlchemyError
 import traceback
 from fastapi.middleware.cors import CORSMiddleware
 from pydantic import BaseModel
-import openai
-from openai import OpenAIError, RateLimitError
 from fastapi_cache import FastAPICache
-from fastapi_cache.decorator import cache
 from redis import asyncio as aioredis
+from services.employee_table import parse_datatables_params, get_employee_page
+from services.search_index import directory_index
+from services.hr_chat import hr_chat, sse_events, error_message
+from services.id_proof_store import id_proof_store, FileTooLarge
+from services.file_delivery import serve_file
+from services.export import EXPORT_FORMATS, parse_columns
+from services.listing_format import (
+    is_compact, compact_page, dumps, json_response,
+    EMPLOYEE_COLUMNS, USER_COLUMNS, employee_values, user_values, employee_capabilities, user_capabilities,
+)
+from services.bulk_import import detect_format, iter_records, import_employees
+from services.hashing import hash_password_async, verify_password_async, hashing_executor
+from services.quotes import get_daily_quote
+from services.principal_cache import principal_cache
+from services.sql_metrics import sql_metrics
+from services.slip_cache import slip_cache, slip_cache_key
+from services.slip_renderer import render_salary_slip
+from services.payroll_run import start_run, get_run_progress, RunInProgress
+from services.payroll_engine import payroll_summary
+from services.audit_writer import audit_writer
+from services.audit_query import query_audit_logs
+from services.cache_tags import identity_key, cache_get_json, cache_set_json, cache_get_text, cache_set_text, bump_tags, bump_tags_from_thread
 
 
 router = APIRouter()
 templates = Jinja2Templates(directory="templates")
 static_paths = STATIC_PATHS
-quote, author = get_daily_quote()
-today = date.today()
+
+
+def daily_quote():
+    quote, author = get_daily_quote()
+    return {"quote": quote, "author": author, "todays_date": date.today()}
 
 
 class ChatRequest(BaseModel):
@@ -42,20 +65,20 @@ async def register_page(request: Request):
 @router.get("/")
 async def login_page(request: Request):
     if request.session.get("user_id"):
-        return templates.TemplateResponse("dashboard.html", {"request": request,**static_paths,"quote": quote,"author": author,"todays_date":today})
+        return templates.TemplateResponse("dashboard.html", {"request": request,**static_paths,**daily_quote()})
     return templates.TemplateResponse("login.html", {"request": request,**static_paths, "message": "","status":400})
 
 @router.post("/")
-def login_user(request: Request, email_id: str = Form(...), password: str = Form(...), db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.email == email_id, User.status == "Y").first()
-    if not user or not verify_password(password, user.password):
+async def login_user(request: Request, email_id: str = Form(...), password: str = Form(...), db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.email == email_id, User.status == "Y"))
+    if not user or not await verify_password_async(password, user.password):
         return templates.TemplateResponse("login.html", {"request": request, **static_paths,"message": "Invalid email or password","status":400})
 
     # Set session
     request.session["user_id"] = user.id
     request.session["email"] = user.email
     request.session["role"] = user.role 
-    return templates.TemplateResponse("dashboard.html", {"request": request, **static_paths,"user": user,"quote": quote,"author": author,"todays_date":today})
+    return templates.TemplateResponse("dashboard.html", {"request": request, **static_paths,"user": user,**daily_quote()})
 
 @router.get("/logout")
 def logout(request: Request):
@@ -64,56 +87,73 @@ def logout(request: Request):
 
 
 @router.post("/register")
-def register(
+async def register(
     request: Request,
     full_name: str = Form(...),
     email: str = Form(...),
     password: str = Form(...),
     role: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     try:
-        existing_user = db.query(User).filter(User.email == email).first()
+        existing_user = await db.scalar(select(User).where(User.email == email))
         if existing_user:
             raise HTTPException(status_code=400, detail=f"User with email {email} already exists.")
         role_enum = UserRole(role.strip())
     except ValueError:
         return {"error": "Invalid role selected."}
 
-    hashed_pw = hash_password(password)
+    hashed_pw = await hash_password_async(password)
     new_user = User(full_name=full_name, email=email, password=hashed_pw, role=role_enum)
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await bump_tags("users")
+    await db.refresh(new_user)
+    directory_index.upsert(new_user)
 
     return RedirectResponse("/users", status_code=302)
 
 @router.get("/dashboard")
 async def dashboard_page(request: Request):
     if request.session.get("user_id"):
-        return templates.TemplateResponse("dashboard.html", {"request": request,**static_paths,"quote": quote,"author": author,"todays_date":today})
+        return templates.TemplateResponse("dashboard.html", {"request": request,**static_paths,**daily_quote()})
     return templates.TemplateResponse("login.html", {"request": request,**static_paths,"status":400})
 
 @router.get("/employee")
-async def employee_page(request: Request, db: Session = Depends(get_db)):
+async def employee_page(request: Request, db: AsyncSession = Depends(get_async_db)):
     if not request.session.get("user_id"):
         return templates.TemplateResponse("login.html", {"request": request,**static_paths,"status":400})
     
     return templates.TemplateResponse( "employee.html", { "request": request, **static_paths} )
 
 @router.get("/users")
-async def users_page(request: Request, db: Session = Depends(get_db)):
+async def users_page(request: Request, db: AsyncSession = Depends(get_async_db)):
     if not request.session.get("user_id"):
         return templates.TemplateResponse("login.html", {"request": request,**static_paths,"status":400})
     
     return templates.TemplateResponse( "users.html", { "request": request, **static_paths} )
 
 @router.get("/users/data")
-@cache(expire=120)
-def users_data(db: Session = Depends(get_db)):
+async def users_data(request: Request, db: AsyncSession = Depends(get_async_db)):
+    compact = is_compact(request)
+    cache_key = await identity_key("users_data", request, ("users",))
+    if compact:
+        cached = await cache_get_text(cache_key)
+        if cached is not None:
+            return json_response(cached.encode())
+    else:
+        cached = await cache_get_json(cache_key)
+        if cached is not None:
+            return cached
+
     data = (
-        db.query(User).all()
-    )
+        await db.scalars(select(User))
+    ).all()
+
+    if compact:
+        body = dumps(compact_page(USER_COLUMNS, user_capabilities(), [user_values(usr) for usr in data]))
+        await cache_set_text(cache_key, body.decode())
+        return json_response(body)
 
     rows = []
     for usr in data:
@@ -134,95 +174,159 @@ def users_data(db: Session = Depends(get_db)):
         """
         })
 
+    await cache_set_json(cache_key, {"data": rows})
     return {"data": rows}
     
 @router.get("/employee/data")
-@cache(expire=120)
-def employee_data(request:Request, db: Session = Depends(get_db)):
+async def employee_data(request:Request, db: AsyncSession = Depends(get_async_db)):
     role = request.session.get('role')
     user_id = request.session.get('user_id')
+    # ?format=compact: raw values plus capability flags, buttons are rendered by the page
+    compact = is_compact(request)
+
+    # Cached by hand rather than with @cache: the DataTables draw counter changes on
+    # every request, so it is left out of the key and patched into the cached page
+    cache_key = await identity_key("employee_data", request, ("employees", "users"), ignore=("draw",))
+    cached = await (cache_get_text if compact else cache_get_json)(cache_key)
+
+    # DataTables server-side mode: only the visible page is queried and returned
+    if "draw" in request.query_params:
+        paging = parse_datatables_params(request.query_params)
+        draw = paging["draw"]
+        if cached is not None:
+            return json_response(cached.encode(), draw) if compact else {**cached, "draw": draw}
+
+        data, total, filtered, next_cursor = await get_employee_page(db, paging, user_id=user_id if role == 'Employee' else None)
+        if compact:
+            body = dumps(compact_page(
+                EMPLOYEE_COLUMNS, employee_capabilities(role), [employee_values(emp, usr) for emp, usr in data],
+                recordsTotal=total, recordsFiltered=filtered, next_cursor=next_cursor,
+            ))
+            await cache_set_text(cache_key, body.decode())
+            return json_response(body, draw)
+
+        page = {
+            "draw": draw,
+            "recordsTotal": total,
+            "recordsFiltered": filtered,
+            "next_cursor": next_cursor,
+            "data": [employee_row(emp, usr, role) for emp, usr in data]
+        }
+        await cache_set_json(cache_key, page)
+        return page
+
+    if cached is not None:
+        return json_response(cached.encode()) if compact else cached
+
     if role == 'Employee':
         emp_user  = (
-        db.query(Employee, User)
-        .join(User, Employee.user_id == User.id)
-        .filter(Employee.user_id == user_id).first()
-    )
+        await db.execute(
+            select(Employee, User)
+            .join(User, Employee.user_id == User.id)
+            .where(Employee.user_id == user_id)
+        )
+    ).first()
         data = [emp_user] if emp_user else []  
     else:
         data = (
-            db.query(Employee, User)
-            .join(User, Employee.user_id == User.id)
-            .all()
-        )
+            await db.execute(
+                select(Employee, User)
+                .join(User, Employee.user_id == User.id)
+            )
+        ).all()
 
-    rows = []
-    for emp, usr in data:
-        icon_color = "red" if emp.status == "Y" else "green"
-        if emp.id_proof:
-            preview_icon = f"""
-                <button class='btn btn-sm btn-info'
-                    data-bs-toggle="modal"
-        data-bs-target="#idProofModal"
-        onclick="loadIDProof('{emp.id_proof}')">
-                    <i class='fa fa-eye'></i>
-                </button>
-            """
-        else:
-            preview_icon = ""
-
-        if emp.salary:
-            salary_icon = f"""
-                <a class='btn btn-sm btn-primary' href='/salary-slip/{emp.id}'>
-                    <i class='fa fa-download'></i>
-                </a>
-            """
-        else:
-            salary_icon = ""
+    if compact:
+        body = dumps(compact_page(EMPLOYEE_COLUMNS, employee_capabilities(role), [employee_values(emp, usr) for emp, usr in data]))
+        await cache_set_text(cache_key, body.decode())
+        return json_response(body)
 
-        if role == 'Employee':
-            status_icon = ""
-            edit_icon = ""
-        else:
-            edit_icon ="<a class='btn btn-sm btn-primary' href='/employee/edit/{emp.id}'><i class='fa fa-edit' ></i> </a>"
-            status_icon = "<button class='btn btn-sm btn-warning updateStatus' data-id='{emp.id}'><i class='fa fa-refresh' style='color:{icon_color};'></i></button>"
+    rows = [employee_row(emp, usr, role) for emp, usr in data]
 
+    await cache_set_json(cache_key, {"data": rows})
+    return {"data": rows}
 
-        rows.append({
-            "id": emp.id,
-            "full_name": usr.full_name,
-            "email": usr.email,
-            "phone": emp.phone,
-            "department": emp.department,
-            "designation": emp.designation,
-            "salary": str(emp.salary),
-            "hire_date": emp.hire_date.strftime("%Y-%m-%d"),
-            "salary_slip": {salary_icon},
-            "action": f"""
-            {edit_icon}
-            &nbsp;
-            {status_icon}
-            &nbsp;
-            <a class='btn btn-sm btn-primary' href='/employee/upload_ids/{emp.id}'>
-                <i class='fa fa-upload' ></i>
-            </a>&nbsp;            {preview_icon}
+@router.get("/employee/export")
+def employee_export(request: Request, format: str = "csv", columns: str = None):
+    user_id = request.session.get("user_id")
+    if not user_id:
+        raise HTTPException(status_code=401, detail="Login required")
+    if format not in EXPORT_FORMATS:
+        raise HTTPException(400, f"format must be one of: {', '.join(EXPORT_FORMATS)}")
+
+    stream, media_type, ext = EXPORT_FORMATS[format]
+    headers = {"Content-Disposition": f'attachment; filename="employees_{date.today():%Y%m%d}.{ext}"'}
+    # rows are read with yield_per and sent as they arrive; memory does not grow with headcount
+    return StreamingResponse(
+        stream(SessionLocal, parse_columns(columns), role=request.session.get("role"), user_id=user_id),
+        media_type=media_type,
+        headers=headers,
+    )
+
+def employee_row(emp, usr, role):
+    icon_color = "red" if emp.status == "Y" else "green"
+    if emp.id_proof:
+        preview_icon = f"""
+            <button class='btn btn-sm btn-info'
+                data-bs-toggle="modal"
+    data-bs-target="#idProofModal"
+    onclick="loadIDProof('{emp.id_proof}')">
+                <i class='fa fa-eye'></i>
+            </button>
         """
-        })
+    else:
+        preview_icon = ""
 
-    return {"data": rows}
+    if emp.salary:
+        salary_icon = f"""
+            <a class='btn btn-sm btn-primary' href='/salary-slip/{emp.id}'>
+                <i class='fa fa-download'></i>
+            </a>
+        """
+    else:
+        salary_icon = ""
+
+    if role == 'Employee':
+        status_icon = ""
+        edit_icon = ""
+    else:
+        edit_icon ="<a class='btn btn-sm btn-primary' href='/employee/edit/{emp.id}'><i class='fa fa-edit' ></i> </a>"
+        status_icon = "<button class='btn btn-sm btn-warning updateStatus' data-id='{emp.id}'><i class='fa fa-refresh' style='color:{icon_color};'></i></button>"
+
+    return {
+        "id": emp.id,
+        "full_name": usr.full_name,
+        "email": usr.email,
+        "phone": emp.phone,
+        "department": emp.department,
+        "designation": emp.designation,
+        "salary": str(emp.salary),
+        "hire_date": emp.hire_date.strftime("%Y-%m-%d"),
+        "salary_slip": salary_icon,
+        "action": f"""
+        {edit_icon}
+        &nbsp;
+        {status_icon}
+        &nbsp;
+        <a class='btn btn-sm btn-primary' href='/employee/upload_ids/{emp.id}'>
+            <i class='fa fa-upload' ></i>
+        </a>&nbsp;            {preview_icon}
+    """
+    }
 
 @router.get("/employee/edit/{emp_id}")
-async def edit_employee_page(emp_id: int, request: Request, db: Session = Depends(get_db)):
-    emp = db.query(Employee).filter(Employee.id == emp_id).first()
-    user = db.query(User).filter(User.id == emp.user_id).first()
+async def edit_employee_page(emp_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    result = (await db.execute(select(Employee, User).join(User, Employee.user_id == User.id).where(Employee.id == emp_id))).first()
 
-    if not emp:
+    if not result:
         return templates.TemplateResponse("404.html", {"request": request})
 
+    emp, user = result
+
     return templates.TemplateResponse("edit_employee.html", { "request": request, **static_paths, "emp": emp, "user": user })
 
 @router.get("/employee/upload_ids/{emp_id}")
-async def edit_ids_page(emp_id: int, request: Request, db: Session = Depends(get_db)):
-    emp = db.query(Employee).filter(Employee.id == emp_id).first()
+async def edit_ids_page(emp_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    emp = await db.scalar(select(Employee).where(Employee.id == emp_id))
     error = request.query_params.get("error")
     success = request.query_params.get("success")
     if not emp:
@@ -231,61 +335,74 @@ async def edit_ids_page(emp_id: int, request: Request, db: Session = Depends(get
     return templates.TemplateResponse("upload_ids.html", { "request": request, **static_paths, "emp": emp,"error": error,"success": success })
 
 
+ID_PROOF_VIEWER_ROLES = ("Admin", "Super Admin")
+ID_PROOF_ACCEL_PREFIX = os.getenv("ID_PROOF_ACCEL_PREFIX")  # e.g. /_protected/idproofs behind nginx
+
+@router.get("/id-proofs/{name}")
+async def id_proof_file(name: str, request: Request, thumb: bool = False, db: AsyncSession = Depends(get_async_db)):
+    viewer = request.state.current_user
+    if viewer is None:
+        raise HTTPException(status_code=401, detail="Login required")
+    if not id_proof_store.is_valid_name(name):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    # admins see every proof; anyone else only a proof attached to their own employee record
+    if request.state.current_role not in ID_PROOF_VIEWER_ROLES:
+        owned = await db.scalar(
+            select(Employee.id).where(Employee.id_proof == name, Employee.user_id == viewer.id).limit(1)
+        )
+        if owned is None:
+            raise HTTPException(status_code=403, detail="Access denied")
+
+    path = id_proof_store.thumbnail_path(name) if thumb else id_proof_store.path(name)
+    if not os.path.isfile(path):
+        raise HTTPException(status_code=404, detail="Not found")
+
+    content_hash = id_proof_store.content_hash(name)
+    accel_path = None
+    if ID_PROOF_ACCEL_PREFIX:
+        accel_path = f"{ID_PROOF_ACCEL_PREFIX}/{'thumbs/' if thumb else ''}{os.path.basename(path)}"
+    return serve_file(
+        request,
+        path,
+        # content-addressed blobs never change under the same name
+        content_hash=f"{content_hash}-thumb" if content_hash and thumb else content_hash,
+        cache_control="private, max-age=31536000, immutable" if content_hash else "private, no-cache",
+        accel_path=accel_path,
+    )
+
+
 @router.post("/employee/update_id_proof")
 async def update_id_proof(employee_id: int = Form(...),
     upload_file: UploadFile = Form(...),
-    db: Session = Depends(get_db)):
-
-    dest_folder  = "static/uploads/idproofs"
-    os.makedirs(dest_folder , exist_ok=True)
+    db: AsyncSession = Depends(get_async_db)):
 
     content_type = upload_file.content_type
     if content_type not in ALLOWED_CONTENT_TYPES:
         #raise HTTPException(status_code=400, detail=f"Unsupported file type: {content_type}")
         return RedirectResponse(url=f"/employee/upload_ids/{employee_id}?error=Unsupported file type: {content_type}",status_code=303)
 
-    # generate unique filename, keep original extension
-    ext = os.path.splitext(upload_file.filename)[1].lower()
-    if not ext:
-        # try guess from content_type
-        ext_map = {
-            "image/png": ".png",
-            "image/jpeg": ".jpg",
-            "image/jpg": ".jpg",
-            "image/gif": ".gif",
-            "application/pdf": ".pdf"
-        }
-        ext = ext_map.get(content_type, "")
-
-    safe_name = f"{uuid.uuid4().hex}{ext}"
-    dest_path = os.path.join(dest_folder, safe_name)
+    employee = await db.scalar(select(Employee).where(Employee.id == employee_id))
+    if not employee:
+        #raise HTTPException(status_code=404, detail="Employee not found")
+        await upload_file.close()
+        return RedirectResponse(url=f"/employee/upload_ids/{employee_id}?error=Employee not found.",status_code=303)
 
-    # stream read/write and check size
-    total = 0
-    CHUNK = 1024 * 64
+    # streamed to disk asynchronously and stored once per distinct content
     try:
-        with open(dest_path, "wb") as buffer:
-            while True:
-                chunk = await upload_file.read(CHUNK)
-                if not chunk:
-                    break
-                total += len(chunk)
-                if total > MAX_FILE_SIZE:
-                    buffer.close()
-                    os.remove(dest_path)
-                    #raise HTTPException(status_code=400, detail=f"File too large. Max {MAX_FILE_SIZE} bytes allowed.")
-                    return RedirectResponse(url=f"/employee/upload_ids/{employee_id}?error=File too large. Max {MAX_FILE_SIZE} bytes allowed.",status_code=303)
-                buffer.write(chunk)
+        safe_name = await id_proof_store.save(db, upload_file, content_type, MAX_FILE_SIZE)
+    except FileTooLarge:
+        #raise HTTPException(status_code=400, detail=f"File too large. Max {MAX_FILE_SIZE} bytes allowed.")
+        return RedirectResponse(url=f"/employee/upload_ids/{employee_id}?error=File too large. Max {MAX_FILE_SIZE} bytes allowed.",status_code=303)
     finally:
         await upload_file.close()
 
-    employee = db.query(Employee).filter(Employee.id == employee_id).first()
-    if not employee:
-        #raise HTTPException(status_code=404, detail="Employee not found")
-        return RedirectResponse(url=f"/employee/upload_ids/{employee_id}?error=Employee not found.",status_code=303)
-
+    old_proof = employee.id_proof
     employee.id_proof = safe_name
-    db.commit()
+    await db.commit()
+    await bump_tags("employees")
+    if old_proof != safe_name:
+        await id_proof_store.release(db, old_proof)
 
     return RedirectResponse(url=f"/employee/upload_ids/{employee_id}?success=ID proof uploaded & updated successfully.",status_code=200)
     
@@ -300,15 +417,16 @@ async def employee_update(
     designation: str = Form(...),
     salary: float = Form(...),
     joining_date: date = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
 
-    emp = db.query(Employee).filter(Employee.id == id).first()
-    user = db.query(User).filter(User.id == emp.user_id).first()
+    result = (await db.execute(select(Employee, User).join(User, Employee.user_id == User.id).where(Employee.id == id))).first()
 
-    if not emp:
+    if not result:
         return {"success": False, "message": "Employee not found"}
 
+    emp, user = result
+
     # Update employee
     emp.phone = mobile
     emp.department = dept
@@ -321,20 +439,23 @@ async def employee_update(
     user.full_name = full_name
     #user.email = email
 
-    db.commit()
+    await db.commit()
+    await bump_tags("employees", "users")
+    directory_index.upsert(user, emp)
+    await principal_cache.invalidate(user.id)
 
     return RedirectResponse("/employee", status_code=302)
 
 
 @router.post("/employee/update-status")
-async def update_employee_status(id: int = Form(...), db: Session = Depends(get_db)):
-    emp = db.query(Employee).filter(Employee.id == id).first()
+async def update_employee_status(id: int = Form(...), db: AsyncSession = Depends(get_async_db)):
+    result = (await db.execute(select(Employee, User).outerjoin(User, Employee.user_id == User.id).where(Employee.id == id))).first()
     
-    if not emp:
+    if not result:
         return {"status": 404, "message": "Employee not found"}
 
+    emp, user = result
     emp.status = "N" if emp.status == "Y" else "Y"   # Toggle
-    user = db.query(User).filter(User.id == emp.user_id).first()
     if user:
         # If employee disabled, disable user
         if emp.status == "N":
@@ -342,28 +463,32 @@ async def update_employee_status(id: int = Form(...), db: Session = Depends(get_
         else:
             user.status = "Y"
 
-    db.commit()
+    await db.commit()
+    await bump_tags("employees", "users")
+    if user:
+        await principal_cache.invalidate(user.id)
 
     return { "status": 200, "new_status": emp.status, "message": "Status updated successfully" }
 
 @router.post("/user/update-status")
-async def update_user_status(id: int = Form(...), db: Session = Depends(get_db)):
+async def update_user_status(id: int = Form(...), db: AsyncSession = Depends(get_async_db)):
     #emp = db.query(Employee).filter(Employee.id == id).first()
-    usr = db.query(User).filter(User.id == id).first()
+    result = (await db.execute(select(User, Employee).outerjoin(Employee, Employee.user_id == User.id).where(User.id == id))).first()
     
-    if not usr:
+    if not result:
         return {"status": 404, "message": "User not found"}
 
+    usr, emp = result
     usr.status = "N" if usr.status == "Y" else "Y"   # Toggle
-    emp = None
     if usr.role == 'Employee':
-        emp = db.query(Employee).filter(Employee.user_id == usr.id).first()
         if emp:
             # If employee disabled, disable user
             emp.status = usr.status
             emp_status = emp.status
 
-    db.commit()
+    await db.commit()
+    await bump_tags("employees", "users")
+    await principal_cache.invalidate(usr.id)
 
     return { "status": 200, "new_status": usr.status, "message": "Status updated successfully" }
 
@@ -372,11 +497,11 @@ async def add_employee(request: Request, message: str = None,user=Depends(requir
     if request.session.get("user_id"):
         error = request.query_params.get("error")
         success = request.query_params.get("success")
-        return templates.TemplateResponse("add_employee.html", {"request": request,**static_paths,"quote": quote,"author": author,"error": error,"success": success})
+        return templates.TemplateResponse("add_employee.html", {"request": request,**static_paths,**daily_quote(),"error": error,"success": success})
     return templates.TemplateResponse("login.html", {"request": request,**static_paths,"status":400})
 
 @router.post("/save_employee")
-def save_employee(
+async def save_employee(
     request: Request,
     full_name: str = Form(...),
     email: str = Form(...),
@@ -386,26 +511,26 @@ def save_employee(
     mobile: str = Form(...),
     salary: str = Form(...),
     joining_date: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
-    existing_user = db.query(User).filter(User.email == email).first()
+    existing_user = await db.scalar(select(User).where(User.email == email))
     if existing_user:
         url = "/add_employee?error=Already Registered!"
         return RedirectResponse(url=url, status_code=303) 
             
-    hashed_pw = hash_password(dob)
+    hashed_pw = await hash_password_async(dob)
     new_user = User(full_name=full_name, email=email, password=hashed_pw, role='Employee')
     db.add(new_user)
-    db.commit()
-    db.refresh(new_user)
+    await db.commit()
+    await db.refresh(new_user)
     user_id = new_user.id
     
     new_employee = Employee(phone=mobile, department=dept, designation=designation, salary=salary, hire_date=joining_date,dob=dob, user_id=user_id)
     db.add(new_employee)     
-    db.commit()  
+    await db.commit()  
+    await bump_tags("employees", "users")
 
-    create_audit_log(
-            db=db,
+    audit_writer.record(
             user_id=request.session.get("user_id"),
             action="CREATE",
             module="EMPLOYEE",
@@ -415,16 +540,37 @@ def save_employee(
             request=request
         )
                 
-    db.refresh(new_employee) 
+    await db.refresh(new_employee) 
+    directory_index.upsert(new_user, new_employee)
 
     url = "/add_employee?message=Employee%20added%20successfully!"
     return RedirectResponse(url=url, status_code=303) 
     #return templates.TemplateResponse("add_employee.html", {"request": request, **static_paths,"message": "Employeem added successful!"})
 
 
+@router.post("/employee/import")
+def import_employee_file(
+    request: Request,
+    upload_file: UploadFile = Form(...),
+    db: Session = Depends(get_db),
+    user=Depends(require_roles("Admin", "Super Admin"))
+):
+    fmt = detect_format(upload_file.filename, upload_file.content_type)
+    try:
+        report = import_employees(db, iter_records(upload_file.file, fmt), actor_id=user.id, request=request)
+    finally:
+        upload_file.file.close()
+
+    if report["inserted"]:
+        directory_index.rebuild(db)
+        bump_tags_from_thread("employees", "users")
+
+    return report
+
+
 @router.get("/user/edit/{user_id}")
-async def edit_user_page(user_id: int, request: Request, db: Session = Depends(get_db)):
-    user = db.query(User).filter(User.id == user_id).first()
+async def edit_user_page(user_id: int, request: Request, db: AsyncSession = Depends(get_async_db)):
+    user = await db.scalar(select(User).where(User.id == user_id))
 
     if not user:
         return templates.TemplateResponse("404.html", {"request": request})
@@ -437,10 +583,10 @@ async def employee_update(
     full_name: str = Form(...),
     email_id: str = Form(...),
     role: str = Form(...),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
 
-    user = db.query(User).filter(User.id == id).first()
+    user = await db.scalar(select(User).where(User.id == id))
 
     if not user:
         return {"success": False, "message": "User not found"}
@@ -451,7 +597,10 @@ async def employee_update(
     user.role = role
 
 
-    db.commit()
+    await db.commit()
+    await bump_tags("employees", "users")
+    directory_index.upsert(user)
+    await principal_cache.invalidate(user.id)
     
     return RedirectResponse("/users", status_code=302)
 
@@ -462,8 +611,39 @@ async def add_user(request: Request, message: str = None,user=Depends(require_ro
     return templates.TemplateResponse("login.html", {"request": request,**static_paths,"status":400})
 
 
+@router.get("/search/typeahead")
+def typeahead(q: str = "", limit: int = 10, user=Depends(require_roles("Admin", "Super Admin", "Support"))):
+    return {"data": directory_index.search(q, limit=min(max(limit, 1), 50))}
+
+@router.get("/search/stats")
+def typeahead_stats(user=Depends(require_roles("Admin", "Super Admin"))):
+    return directory_index.stats()
+
+@router.get("/metrics")
+def metrics(user=Depends(require_roles("Admin", "Super Admin"))):
+    backend = FastAPICache.get_backend()
+    return {
+        "sql": sql_metrics.snapshot(),
+        "hashing": hashing_executor.metrics(),
+        "audit": audit_writer.metrics(),
+        "chat": hr_chat.metrics(),
+        "id_proofs": id_proof_store.metrics(),
+        "cache": backend.stats() if hasattr(backend, "stats") else None,
+    }
+
+@router.get("/metrics/hashing")
+def hashing_metrics(user=Depends(require_roles("Admin", "Super Admin"))):
+    return hashing_executor.metrics()
+
 @router.get("/salary-slip/{employee_id}")
-def salary_slip(employee_id: int, db: Session = Depends(get_db)):
+def salary_slip(employee_id: int, request: Request, period: str = None, db: Session = Depends(get_db)):
+    if period is not None:
+        try:
+            # normalized, so "2026-1" and "2026-01" share one cached slip
+            period = datetime.strptime(period, "%Y-%m").strftime("%Y-%m")
+        except ValueError:
+            raise HTTPException(400, "period must be YYYY-MM")
+
     result = (db.query(Employee, User).join(User, Employee.user_id == User.id).filter(Employee.id == employee_id).first())
 
     if not result:
@@ -474,13 +654,78 @@ def salary_slip(employee_id: int, db: Session = Depends(get_db)):
     if emp.salary is None:
         raise HTTPException(400, "Salary not set for this employee")
 
-    breakup = breakup_salary(Decimal(emp.salary))
-    pdf = generate_pdf(emp,user, breakup)
-
+    period = period or date.today().strftime("%Y-%m")
+    key = slip_cache_key(emp, user, SALARY_RULES_VERSION, period)
+    etag = f'"{key}"'
     headers = {
+        "ETag": etag,
+        "Cache-Control": "private, max-age=86400",
         "Content-Disposition": f'attachment; filename="salary_slip_{user.full_name}.pdf"'
     }
-    return StreamingResponse(pdf, media_type="application/pdf", headers=headers)
+
+    if etag in [t.strip() for t in request.headers.get("if-none-match", "").split(",")]:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": headers["Cache-Control"]})
+
+    path = slip_cache.get(key)
+    if path is None:
+        breakup = breakup_salary(Decimal(emp.salary))
+        pdf = render_salary_slip(emp, user, breakup)
+        path = slip_cache.put(key, pdf.getvalue())
+
+    return FileResponse(path, media_type="application/pdf", headers=headers)
+
+@router.get("/payroll/run")
+def payroll_run(period: str, run_id: str = None, user=Depends(require_roles("Admin", "Super Admin"))):
+    try:
+        datetime.strptime(period, "%Y-%m")
+    except ValueError:
+        raise HTTPException(400, "period must be YYYY-MM")
+
+    try:
+        run = start_run(period, run_id)
+    except ValueError:
+        raise HTTPException(400, "run_id may only contain letters, digits, '-' and '_'")
+    except RunInProgress:
+        raise HTTPException(409, f"Payroll run {run_id or 'for ' + period} is already in progress")
+    headers = {
+        "Content-Disposition": f'attachment; filename="salary_slips_{period}.zip"',
+        "X-Payroll-Run-Id": run.run_id
+    }
+    return StreamingResponse(run.stream_zip(SessionLocal), media_type="application/zip", headers=headers)
+
+@router.get("/payroll/runs/{run_id}")
+def payroll_run_progress(run_id: str, user=Depends(require_roles("Admin", "Super Admin"))):
+    progress = get_run_progress(run_id)
+    if progress is None:
+        raise HTTPException(404, "Payroll run not found")
+    return progress
+
+@router.get("/payroll/summary")
+async def payroll_summary_page(group_by: str = "department", db: AsyncSession = Depends(get_async_db), user=Depends(require_roles("Admin", "Super Admin"))):
+    group_keys = tuple(g.strip() for g in group_by.split(","))
+    if not group_keys or any(g not in ("department", "designation") for g in group_keys):
+        raise HTTPException(400, "group_by must be department, designation or department,designation")
+
+    rows = (await db.execute(
+        select(Employee.department, Employee.designation, Employee.salary)
+        .where(Employee.status == StatusEnum.Y, Employee.salary.isnot(None))
+    )).all()
+    return payroll_summary(rows, group_by=group_keys)
+
+@router.get("/audit/logs")
+async def audit_logs(
+    user_id: int = None,
+    table_name: str = None,
+    record_id: int = None,
+    since: datetime = None,
+    until: datetime = None,
+    cursor: str = None,
+    limit: int = 100,
+    db: AsyncSession = Depends(get_async_db),
+    user=Depends(require_roles("Admin", "Super Admin"))
+):
+    return await query_audit_logs(db, user_id=user_id, table_name=table_name, record_id=record_id,
+                                  since=since, until=until, cursor=cursor, limit=limit)
 
 @router.get("/hr-chat")
 def hr_chat_page(request: Request):
@@ -489,25 +734,20 @@ def hr_chat_page(request: Request):
     return templates.TemplateResponse("login.html", {"request": request,**static_paths,"status":400})
 
 @router.post("/chat/")
-def chat_with_hr(request: ChatRequest, db: Session = Depends(get_db)):
+async def chat_with_hr(request: ChatRequest):
     try:
-        # Fetch employees from DB
-        employees = get_all_employees(db)  # list of dicts with full_name, designation, etc.
-
-        # Convert employee data to readable text
-        employee_text = "\n".join(
-            [f"{e['full_name']} is a {e['designation']} in {e['department']} with salary {e['salary']}" 
-             for e in employees]
-        )
-
-        prompt = f"Here is the employee data:\n{employee_text}\n\nAnswer the following question based on this data: {request.question}"
-
-        answer = ask_chatgpt(prompt)
-        return {"answer": answer}
-
-    except RateLimitError:
-        return {"answer": "Sorry, OpenAI API quota exceeded. Please try again later."}
-    except OpenAIError as e:
-        return {"answer": f"OpenAI API error: {str(e)}"}
+        return {"answer": await hr_chat.answer(request.question)}
     except Exception as e:
-        return {"answer": f"Unexpected error: {str(e)}"}
\ No newline at end of file
+        return {"answer": error_message(e)}
+
+@router.get("/chat/metrics")
+def chat_metrics(user=Depends(require_roles("Admin", "Super Admin"))):
+    return hr_chat.metrics()
+
+@router.post("/chat/stream")
+async def chat_with_hr_stream(request: ChatRequest):
+    return StreamingResponse(
+        sse_events(hr_chat.stream(request.question)),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
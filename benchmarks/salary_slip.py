@@ -0,0 +1,49 @@
+"""Compare utils.generate_pdf with the canvas renderer.
+
+    python -m benchmarks.salary_slip [iterations]
+"""
+import sys
+import time
+import tracemalloc
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from utils import breakup_salary, generate_pdf
+from services.slip_renderer import render_salary_slip
+
+employee = SimpleNamespace(id=1042, department="Engineering", designation="Senior Developer", salary=Decimal("85000.00"), hire_date=date(2021, 4, 1))
+user = SimpleNamespace(full_name="Priya Raman")
+breakup = breakup_salary(employee.salary)
+
+
+def measure(fn, iterations):
+    fn(employee, user, breakup)  # warm up imports and font metrics
+
+    started = time.perf_counter()
+    for _ in range(iterations):
+        fn(employee, user, breakup)
+    elapsed = time.perf_counter() - started
+
+    tracemalloc.start()
+    fn(employee, user, breakup)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    size = len(fn(employee, user, breakup).getvalue())
+    return elapsed / iterations * 1000, peak, size
+
+
+def main():
+    iterations = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    results = {}
+    for name, fn in (("generate_pdf", generate_pdf), ("render_salary_slip", render_salary_slip)):
+        results[name] = measure(fn, iterations)
+        ms, peak, size = results[name]
+        print(f"{name:20s} {ms:8.3f} ms/slip  peak {peak / 1024:8.1f} KiB  output {size / 1024:6.1f} KiB")
+
+    speedup = results["generate_pdf"][0] / results["render_salary_slip"][0]
+    print(f"speedup: {speedup:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+"""Time DirectoryIndex rebuilds and typeahead queries on a synthetic directory.
+
+    python -m benchmarks.search_index [documents]
+
+Exits non-zero when a 1-2 character query averages over SHORT_QUERY_BUDGET_MS
+(only checked at 10k documents or more).
+"""
+import random
+import sys
+import time
+from types import SimpleNamespace
+from services.search_index import DirectoryIndex
+
+SHORT_QUERY_BUDGET_MS = 1.0
+FIRST_NAMES = ("Priya", "Arjun", "Sara", "Rahul", "Anita", "Vikram", "Meera", "Kiran", "Deepa", "Sanjay")
+LAST_NAMES = ("Raman", "Sharma", "Iyer", "Patel", "Singh", "Nair", "Das", "Menon", "Rao", "Kapoor")
+DEPARTMENTS = ("Engineering", "Sales", "Finance", "Human Resources", "Support", "Operations")
+DESIGNATIONS = ("Software Engineer", "Senior Developer", "Account Manager", "Analyst", "Team Lead", "HR Executive")
+QUERIES = ("a", "s", "pr", "ra", "engineer", "corp", "priya raman", "sales")
+
+
+class _Rows:
+    """Just enough of a Session for DirectoryIndex.rebuild."""
+
+    def __init__(self, rows):
+        self.rows = rows
+
+    def query(self, *entities):
+        return self
+
+    def outerjoin(self, *args):
+        return self
+
+    def all(self):
+        return self.rows
+
+
+def make_rows(count):
+    rng = random.Random(7)
+    rows = []
+    for i in range(count):
+        first, last = rng.choice(FIRST_NAMES), rng.choice(LAST_NAMES)
+        user = SimpleNamespace(id=i + 1, full_name=f"{first} {last}", email=f"{first}.{last}{i}@corp.com".lower(), role="Employee")
+        emp = SimpleNamespace(id=i + 1, department=rng.choice(DEPARTMENTS), designation=rng.choice(DESIGNATIONS))
+        rows.append((user, emp))
+    return rows
+
+
+def main():
+    documents = int(sys.argv[1]) if len(sys.argv) > 1 else 30_000
+    index = DirectoryIndex()
+    index.rebuild(_Rows(make_rows(documents)))
+    print(f"rebuild of {documents} documents: {index.last_rebuild_seconds * 1000:.1f} ms")
+
+    slow = []
+    for q in QUERIES:
+        index.search(q)  # warm up
+        iterations = 200
+        started = time.perf_counter()
+        for _ in range(iterations):
+            index.search(q)
+        ms = (time.perf_counter() - started) / iterations * 1000
+        print(f"{q!r:14s} {ms:8.3f} ms/query")
+        if len(q) <= 2 and documents >= 10_000 and ms > SHORT_QUERY_BUDGET_MS:
+            slow.append(q)
+
+    if slow:
+        print(f"short queries over {SHORT_QUERY_BUDGET_MS} ms: {', '.join(slow)}")
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,36 +1,90 @@
 from fastapi import FastAPI, Request
-from fastapi.staticfiles import StaticFiles
 from starlette.middleware.sessions import SessionMiddleware
 from fastapi.templating import Jinja2Templates
 from auth.router import router as auth_router
 from utils import  STATIC_PATHS
 from middleware.auth_middleware import UserRoleMiddleware
+from middleware.query_stats_middleware import QueryStatsMiddleware
 from contextlib import asynccontextmanager
+import asyncio
 from redis import asyncio as aioredis
 from fastapi_cache import FastAPICache
-from fastapi_cache.backends.redis import RedisBackend
+import os
+from database import SessionLocal, async_engine
+from services.audit_writer import audit_writer
+from services.audit_partitions import maintenance_loop
+from services.search_index import directory_index
+from services.hr_context import hr_context
+from services.answer_cache import answer_cache
+from services.hashing import hashing_executor
+from services.payroll_run import render_pool
+from services.id_proof_store import id_proof_store
+from services.quotes import quote_provider
+from services.principal_cache import principal_cache, PRINCIPAL_CACHE_REDIS
+from services.tiered_cache import TieredBackend
+from services.static_assets import PrecompressedStaticFiles
+
+REDIS_URL = os.getenv("REDIS_URL", "redis://localhost:6379")
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
 
     # --- Startup ---
     redis = aioredis.from_url(
-        "redis://localhost:6379",
+        REDIS_URL,
         encoding="utf-8",
         decode_responses=True
     )
 
+    cache_backend = TieredBackend(redis)
     FastAPICache.init(
-        RedisBackend(redis),
+        cache_backend,
         prefix="emp_cache"
     )
 
-    print("✅ Redis Cache Initialized")
+    # without Redis the in-process tier keeps serving and Redis is retried in the background
+    if await cache_backend.ping():
+        print("✅ Redis Cache Initialized")
+    cache_backend.start()
+
+    # daily quote is fetched in the background; pages use the fallback until then
+    quote_provider.start(redis)
+    audit_writer.start(async_engine)
+    audit_maintenance = asyncio.create_task(maintenance_loop(async_engine))
+
+    # slip rendering workers live for the whole process instead of one pool per run
+    render_pool.start()
+
+    if PRINCIPAL_CACHE_REDIS:
+        principal_cache.attach(redis, cache_backend)
+
+    moved = id_proof_store.migrate_legacy()
+    if moved:
+        print(f"✅ Moved {moved} ID proofs out of /static")
+
+    db = SessionLocal()
+    try:
+        directory_index.rebuild(db)
+        stats = directory_index.stats()
+        print(f"✅ Directory index built: {stats['documents']} entries in {stats['last_rebuild_seconds']:.3f}s")
+        hr_context.rebuild(db, await answer_cache.version())
+    except Exception as e:
+        print(f"⚠️ Directory index not built: {e}")
+    finally:
+        db.close()
 
     yield
 
     # --- Shutdown ---
+    await quote_provider.stop()
+    await audit_writer.stop()
+    audit_maintenance.cancel()
+    await cache_backend.stop()
     await redis.close()
+    hashing_executor.shutdown()
+    render_pool.shutdown()
+    id_proof_store.shutdown()
+    await async_engine.dispose()
     print("🛑 Redis connection closed")
 
 
@@ -38,8 +92,9 @@ app = FastAPI(lifespan=lifespan)
 app.add_middleware(UserRoleMiddleware)
 
 # Mount static folder
-app.mount("/static", StaticFiles(directory="static"), name="static")
+app.mount("/static", PrecompressedStaticFiles(directory="static"), name="static")
 app.add_middleware(SessionMiddleware, secret_key="supersecretkey")
+app.add_middleware(QueryStatsMiddleware)
 # Include auth router
 app.include_router(auth_router)
 
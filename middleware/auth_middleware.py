@@ -3,31 +3,39 @@ from fastapi import Request
 from sqlalchemy.orm import Session
 from database import SessionLocal
 from models import User
+from services.principal_cache import Principal, principal_cache
+
+SKIP_PREFIXES = ("/static",)
 
 class UserRoleMiddleware(BaseHTTPMiddleware):
     async def dispatch(self, request: Request, call_next):
-        # Create DB session manually for middleware
-        db: Session = SessionLocal()
-
         request.state.current_user = None
         request.state.current_role = None
 
-        try:
-            # Example: get user_id from session
-            user_id = request.session.get("user_id")
-
-            if user_id:
-                user = db.query(User).filter(
-                    User.id == user_id,
-                    User.status == "Y"
-                ).first()
-                
-                if user:
-                    request.state.current_user = user
-                    request.state.current_role = user.role
-
-            response = await call_next(request)
-        finally:
-            db.close()
-
-        return response
+        # Static assets never need the logged-in user
+        if request.url.path.startswith(SKIP_PREFIXES):
+            return await call_next(request)
+
+        # Example: get user_id from session
+        user_id = request.session.get("user_id")
+
+        if user_id:
+            user = await principal_cache.aget(user_id)
+
+            if user is None:
+                # Create DB session manually for middleware, only on a cache miss
+                db: Session = SessionLocal()
+                try:
+                    row = db.query(User).filter(User.id == user_id).first()
+                finally:
+                    db.close()
+
+                if row:
+                    user = Principal.from_user(row)
+                    await principal_cache.aset(user)
+
+            if user and user.status == "Y":
+                request.state.current_user = user
+                request.state.current_role = user.role
+
+        return await call_next(request)
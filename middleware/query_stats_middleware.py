@@ -0,0 +1,26 @@
+from starlette.middleware.base import BaseHTTPMiddleware
+from fastapi import Request
+from services.sql_metrics import sql_metrics, start_request, end_request, SQL_QUERY_BUDGET, QueryBudgetExceeded
+
+# one bucket for every path no route matched, so 404 scans can't grow the metrics
+UNMATCHED_ROUTE = "<unmatched>"
+
+class QueryStatsMiddleware(BaseHTTPMiddleware):
+    async def dispatch(self, request: Request, call_next):
+        if request.url.path.startswith("/static"):
+            return await call_next(request)
+
+        stats, token = start_request()
+        try:
+            response = await call_next(request)
+        finally:
+            end_request(token)
+
+        route = request.scope.get("route")
+        sql_metrics.add(route.path if route else UNMATCHED_ROUTE, stats)
+
+        if SQL_QUERY_BUDGET is not None and stats.count > SQL_QUERY_BUDGET:
+            raise QueryBudgetExceeded(f"{request.url.path} issued {stats.count} queries, budget is {SQL_QUERY_BUDGET}")
+
+        response.headers.update(stats.headers())
+        return response
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum,text, Numeric, Date, ForeignKey, JSON, DateTime
+from sqlalchemy import Column, Integer, String, Enum,text, Numeric, Date, ForeignKey, JSON, DateTime, Index
 from datetime import datetime
 from sqlalchemy.orm import relationship
 from database import Base
@@ -17,6 +17,10 @@ class StatusEnum(str, enum.Enum):
 
 class User(Base):
     __tablename__ = "users"
+    __table_args__ = (
+        # bulk import matches existing emails case-insensitively
+        Index("ix_users_email_lower", text("lower(email)")),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     full_name = Column(String, nullable=False)
@@ -37,13 +41,13 @@ class Employee(Base):
 
     id = Column(Integer, primary_key=True, index=True)
     phone = Column(String, nullable=False)
-    department = Column(String, nullable=False)
-    designation = Column(String, nullable=False)
+    department = Column(String, nullable=False, index=True)
+    designation = Column(String, nullable=False, index=True)
     salary = Column(Numeric, nullable=False)
-    hire_date = Column(Date, nullable=False)
+    hire_date = Column(Date, nullable=False, index=True)
     status = Column(Enum(StatusEnum, name="status_enum"), default=StatusEnum.Y)
     dob = Column(Date, nullable=False)
-    id_proof = Column(String, nullable=False)
+    id_proof = Column(String, nullable=False, index=True)
 
     # user_id is just an INTEGER column — NOT a foreign key
     user_id = Column( Integer, ForeignKey( "users.id", name="fk_user_employee", deferrable=True, initially="DEFERRED", use_alter=True ), nullable=False )
@@ -51,8 +55,15 @@ class Employee(Base):
 
 class AuditLog(Base):
     __tablename__ = "audit_logs"
+    # Monthly RANGE partitions on created_at; see services/audit_partitions.py
+    __table_args__ = (
+        Index("ix_audit_logs_table_record_created", "table_name", "record_id", "created_at"),
+        Index("ix_audit_logs_user_created", "user_id", "created_at"),
+        Index("ix_audit_logs_created_brin", "created_at", postgresql_using="brin"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id = Column(Integer, primary_key=True, index=True)
+    id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, nullable=True)
     action = Column(String, nullable=False)
     table_name = Column(String, nullable=False)  # employee, login, salary, etc.
@@ -61,4 +72,4 @@ class AuditLog(Base):
     new_data = Column(JSONB, nullable=True)
     ip_address = Column(String, nullable=True)
     user_agent = Column(String, nullable=True)
-    created_at = Column(DateTime, default=datetime.utcnow)
+    created_at = Column(DateTime, primary_key=True, default=datetime.utcnow)
@@ -0,0 +1,83 @@
+import hashlib
+import os
+import re
+from fastapi_cache import FastAPICache
+from services.cache_tags import tag_versions, cache_get_json, cache_set_json
+
+CHAT_ANSWER_TTL = int(os.getenv("CHAT_ANSWER_TTL", str(24 * 60 * 60)))
+# the same tags the listings use; every Employee/User write bumps them
+DATA_TAGS = ("employees", "users")
+
+# stop words only: anything that could change what is asked (synonyms, "total" vs
+# "how many") stays in the key, so different questions never share an answer
+FILLER = {"please", "the", "a", "an", "of", "in", "our", "we", "do", "does", "is", "are", "there", "what", "whats", "s", "me", "tell", "can", "you"}
+_PUNCTUATION = re.compile(r"[^\w\s]")
+
+
+def normalize_question(question):
+    words = _PUNCTUATION.sub(" ", question.lower()).split()
+    return " ".join(w for w in words if w not in FILLER) or " ".join(words)
+
+
+class AnswerCache:
+    """HR chat answers keyed on the normalized question and the employee data version."""
+
+    def __init__(self, ttl=CHAT_ANSWER_TTL):
+        self.ttl = ttl
+        self.hits = 0
+        self.misses = 0
+        self.stores = 0
+        self.errors = 0
+
+    async def version(self):
+        """Current data version, or None if it can't be read (answers then aren't cached)."""
+        try:
+            return await tag_versions(DATA_TAGS)
+        except Exception:
+            self.errors += 1
+            return None
+
+    def key(self, question, version):
+        # the caller reads the version once per question, so an answer computed
+        # while the data changed is stored under the version it was built from
+        if version is None:
+            return None
+        raw = f"{version}|{normalize_question(question)}"
+        return f"{FastAPICache.get_prefix()}:hr_answer:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+    async def get(self, key):
+        if key is None:
+            self.misses += 1
+            return None
+        try:
+            entry = await cache_get_json(key)
+        except Exception:
+            self.errors += 1
+            entry = None
+        if entry is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return entry["answer"]
+
+    async def put(self, key, answer):
+        if key is None or not answer:
+            return
+        try:
+            await cache_set_json(key, {"answer": answer}, self.ttl)
+            self.stores += 1
+        except Exception:
+            self.errors += 1
+
+    def metrics(self):
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / lookups, 4) if lookups else None,
+            "stores": self.stores,
+            "errors": self.errors,
+        }
+
+
+answer_cache = AnswerCache()
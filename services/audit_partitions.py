@@ -0,0 +1,149 @@
+import argparse
+import asyncio
+import os
+from datetime import date
+from sqlalchemy import text
+
+# months of partitions kept ahead of today; 0 retention months = keep everything
+AUDIT_PARTITIONS_AHEAD = int(os.getenv("AUDIT_PARTITIONS_AHEAD", "3"))
+AUDIT_RETENTION_MONTHS = int(os.getenv("AUDIT_RETENTION_MONTHS", "0"))
+MAINTENANCE_INTERVAL = 24 * 60 * 60
+
+
+def _month_start(d, offset=0):
+    month = d.year * 12 + d.month - 1 + offset
+    return date(month // 12, month % 12 + 1, 1)
+
+
+def partition_name(month):
+    return f"audit_logs_{month:%Y_%m}"
+
+
+def is_partitioned(conn):
+    return bool(conn.execute(text(
+        "SELECT 1 FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid WHERE c.relname = 'audit_logs'"
+    )).scalar())
+
+
+def ensure_partitions(conn, today=None, ahead=AUDIT_PARTITIONS_AHEAD, start=None):
+    today = today or date.today()
+    month = _month_start(start or today)
+    last = _month_start(today, ahead)
+    created = []
+    while month <= last:
+        nxt = _month_start(month, 1)
+        conn.execute(text(
+            f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF audit_logs "
+            f"FOR VALUES FROM ('{month.isoformat()}') TO ('{nxt.isoformat()}')"
+        ))
+        created.append(partition_name(month))
+        month = nxt
+    return created
+
+
+def drop_expired_partitions(conn, keep_months, today=None):
+    if keep_months <= 0:
+        return []
+    cutoff = partition_name(_month_start(today or date.today(), -keep_months))
+    names = conn.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'audit_logs'"
+    )).scalars().all()
+    # partition names sort chronologically (audit_logs_YYYY_MM)
+    dropped = sorted(n for n in names if n < cutoff)
+    for name in dropped:
+        conn.execute(text(f"ALTER TABLE audit_logs DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+    return dropped
+
+
+def migrate_to_partitioned(conn):
+    """One-off: move the plain audit_logs table under a monthly RANGE-partitioned parent.
+
+    The old rows are copied and the old table is kept as audit_logs_legacy
+    for the operator to drop once verified.
+    """
+    if is_partitioned(conn):
+        return False
+
+    oldest = conn.execute(text("SELECT min(created_at) FROM audit_logs")).scalar()
+
+    conn.execute(text("ALTER TABLE audit_logs RENAME TO audit_logs_legacy"))
+    conn.execute(text("ALTER SEQUENCE audit_logs_id_seq OWNED BY NONE"))
+    for index in conn.execute(text(
+        "SELECT indexname FROM pg_indexes WHERE tablename = 'audit_logs_legacy' AND indexname LIKE 'ix_audit_logs_%'"
+    )).scalars().all():
+        conn.execute(text(f"ALTER INDEX {index} RENAME TO {index.replace('ix_audit_logs_', 'ix_audit_logs_legacy_', 1)}"))
+
+    conn.execute(text("""
+        CREATE TABLE audit_logs (
+            id integer NOT NULL DEFAULT nextval('audit_logs_id_seq'),
+            user_id integer,
+            action varchar NOT NULL,
+            table_name varchar NOT NULL,
+            record_id integer,
+            old_data jsonb,
+            new_data jsonb,
+            ip_address varchar,
+            user_agent varchar,
+            created_at timestamp NOT NULL DEFAULT (now() AT TIME ZONE 'utc'),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+    """))
+    conn.execute(text("ALTER SEQUENCE audit_logs_id_seq OWNED BY audit_logs.id"))
+    conn.execute(text("CREATE INDEX ix_audit_logs_table_record_created ON audit_logs (table_name, record_id, created_at)"))
+    conn.execute(text("CREATE INDEX ix_audit_logs_user_created ON audit_logs (user_id, created_at)"))
+    conn.execute(text("CREATE INDEX ix_audit_logs_created_brin ON audit_logs USING brin (created_at)"))
+
+    ensure_partitions(conn, start=oldest.date() if oldest else None)
+    conn.execute(text("""
+        INSERT INTO audit_logs (id, user_id, action, table_name, record_id, old_data, new_data, ip_address, user_agent, created_at)
+        SELECT id, user_id, action, table_name, record_id, old_data, new_data, ip_address, user_agent,
+               coalesce(created_at, now() AT TIME ZONE 'utc')
+        FROM audit_logs_legacy
+    """))
+    return True
+
+
+def run_maintenance(conn):
+    if not is_partitioned(conn):
+        return {"partitioned": False}
+    return {
+        "partitioned": True,
+        "ensured": ensure_partitions(conn),
+        "dropped": drop_expired_partitions(conn, AUDIT_RETENTION_MONTHS),
+    }
+
+
+async def maintenance_loop(async_engine):
+    while True:
+        try:
+            async with async_engine.begin() as conn:
+                result = await conn.run_sync(run_maintenance)
+            if result.get("dropped"):
+                print(f"🧹 Dropped audit partitions: {', '.join(result['dropped'])}")
+        except Exception as e:
+            print(f"⚠️ Audit partition maintenance failed: {e}")
+        await asyncio.sleep(MAINTENANCE_INTERVAL)
+
+
+def main():
+    from database import engine
+
+    parser = argparse.ArgumentParser(description="Audit log partition management")
+    parser.add_argument("command", choices=("migrate", "maintain"))
+    parser.add_argument("--keep-months", type=int, default=AUDIT_RETENTION_MONTHS)
+    args = parser.parse_args()
+
+    with engine.begin() as conn:
+        if args.command == "migrate":
+            print("migrated" if migrate_to_partitioned(conn) else "audit_logs is already partitioned")
+        ensure_partitions(conn)
+        dropped = drop_expired_partitions(conn, args.keep_months)
+        if dropped:
+            print(f"dropped: {', '.join(dropped)}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+import base64
+import binascii
+import json
+from datetime import datetime, timezone
+from fastapi import HTTPException
+from sqlalchemy import select, tuple_
+from models import AuditLog
+
+MAX_PAGE_SIZE = 500
+
+
+def naive_utc(value):
+    # audit_logs.created_at is a naive timestamp holding UTC; asyncpg refuses aware values for it
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+def encode_cursor(log):
+    raw = json.dumps([log.created_at.isoformat(), log.id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(token):
+    try:
+        created_at, log_id = json.loads(base64.urlsafe_b64decode(token))
+        return naive_utc(datetime.fromisoformat(created_at)), int(log_id)
+    except (ValueError, TypeError, binascii.Error):
+        raise HTTPException(status_code=400, detail="Invalid cursor")
+
+
+async def query_audit_logs(db, user_id=None, table_name=None, record_id=None, since=None, until=None, cursor=None, limit=100):
+    # newest first; (created_at, id) is both the sort key and the keyset cursor,
+    # and the created_at bounds let Postgres prune monthly partitions
+    since, until = naive_utc(since), naive_utc(until)
+    stmt = select(AuditLog)
+    if user_id is not None:
+        stmt = stmt.where(AuditLog.user_id == user_id)
+    if table_name is not None:
+        stmt = stmt.where(AuditLog.table_name == table_name)
+    if record_id is not None:
+        stmt = stmt.where(AuditLog.record_id == record_id)
+    if since is not None:
+        stmt = stmt.where(AuditLog.created_at >= since)
+    if until is not None:
+        stmt = stmt.where(AuditLog.created_at < until)
+    if cursor:
+        stmt = stmt.where(tuple_(AuditLog.created_at, AuditLog.id) < decode_cursor(cursor))
+
+    limit = min(max(limit, 1), MAX_PAGE_SIZE)
+    logs = (await db.scalars(
+        stmt.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit)
+    )).all()
+
+    return {
+        "data": [
+            {
+                "id": log.id,
+                "user_id": log.user_id,
+                "action": log.action,
+                "table_name": log.table_name,
+                "record_id": log.record_id,
+                "old_data": log.old_data,
+                "new_data": log.new_data,
+                "ip_address": log.ip_address,
+                "user_agent": log.user_agent,
+                "created_at": log.created_at.isoformat(),
+            }
+            for log in logs
+        ],
+        "next_cursor": encode_cursor(logs[-1]) if len(logs) == limit else None,
+    }
@@ -0,0 +1,282 @@
+import asyncio
+import fcntl
+import glob
+import json
+import os
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime, timezone
+from sqlalchemy import insert
+from sqlalchemy.exc import DataError, DBAPIError, IntegrityError, StatementError
+from models import AuditLog
+
+AUDIT_QUEUE_SIZE = int(os.getenv("AUDIT_QUEUE_SIZE", "10000"))
+AUDIT_BATCH_SIZE = int(os.getenv("AUDIT_BATCH_SIZE", "500"))
+AUDIT_FLUSH_INTERVAL = float(os.getenv("AUDIT_FLUSH_INTERVAL", "1.0"))
+AUDIT_SPILL_PATH = os.getenv("AUDIT_SPILL_PATH", ".cache/audit_spill.jsonl")
+AUDIT_QUARANTINE_PATH = os.getenv("AUDIT_QUARANTINE_PATH", ".cache/audit_quarantine.jsonl")
+
+
+def _is_row_error(e):
+    # the rows themselves are bad (constraint, type, encoding), as opposed to
+    # the database being unreachable; retrying those unchanged never succeeds
+    return isinstance(e, (IntegrityError, DataError)) or (isinstance(e, StatementError) and not isinstance(e, DBAPIError))
+
+
+def _pid_alive(pid):
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        pass
+    return True
+
+
+def audit_entry(user_id, action, module, record_id, old_data=None, new_data=None, request=None):
+    return {
+        "user_id": user_id,
+        "action": action,
+        "table_name": module,
+        "record_id": record_id,
+        "old_data": old_data,
+        "new_data": new_data,
+        "ip_address": request.client.host if request and request.client else None,
+        "user_agent": request.headers.get("user-agent") if request else None,
+        # audit_logs.created_at is a naive timestamp holding UTC
+        "created_at": datetime.now(timezone.utc).replace(tzinfo=None),
+    }
+
+
+class AuditWriter:
+    """Buffers audit rows in memory and writes them in multi-row inserts off the request path.
+
+    Rows that cannot be written are appended to a spill file shared by all
+    workers (guarded by an flock). A worker claims the whole spill file by
+    renaming it to its own .replay file and replays it at most one batch per
+    flush, in a transaction separate from new rows. A failing replay batch is
+    halved until the bad row is alone; a single row the database rejects is
+    moved to the quarantine file instead of blocking the rest.
+    """
+
+    def __init__(self, queue_size=AUDIT_QUEUE_SIZE, batch_size=AUDIT_BATCH_SIZE,
+                 flush_interval=AUDIT_FLUSH_INTERVAL, spill_path=AUDIT_SPILL_PATH,
+                 quarantine_path=AUDIT_QUARANTINE_PATH):
+        self.queue_size = queue_size
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.spill_path = spill_path
+        self.quarantine_path = quarantine_path
+        self.engine = None
+        self._queue = None
+        self._loop = None
+        self._task = None
+        self._replay = deque()
+        self._replay_size = batch_size
+        self.written = 0
+        self.dropped = 0
+        self.spilled = 0
+        self.replayed = 0
+        self.quarantined = 0
+        self.failed_flushes = 0
+
+    @property
+    def replay_path(self):
+        return f"{self.spill_path}.{os.getpid()}.replay"
+
+    # ---------- producers ----------
+    def record(self, user_id, action, module, record_id, old_data=None, new_data=None, request=None):
+        self.submit(audit_entry(user_id, action, module, record_id, old_data, new_data, request))
+
+    def submit(self, entry):
+        if self._queue is None:
+            # writer not running (CLI, tests): keep the row for the next start
+            self._spill([entry])
+            return
+        try:
+            running = asyncio.get_running_loop()
+        except RuntimeError:
+            running = None
+        if running is self._loop:
+            self._put(entry)
+        else:
+            self._loop.call_soon_threadsafe(self._put, entry)
+
+    def _put(self, entry):
+        try:
+            self._queue.put_nowait(entry)
+        except asyncio.QueueFull:
+            self.dropped += 1
+
+    # ---------- consumer ----------
+    def start(self, engine):
+        self._recover_orphans()
+        self.engine = engine
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        # flush whatever is still queued before the process exits
+        batch = []
+        while not self._queue.empty():
+            batch.append(self._queue.get_nowait())
+        self._queue = None
+        await self._write(batch)
+        # hand what is left of the claimed backlog back to the shared spill file
+        if self._replay:
+            self._append(self.spill_path, list(self._replay))
+            self._replay.clear()
+        self._remove_replay_file()
+
+    async def _run(self):
+        batch = []
+        try:
+            while True:
+                batch = [await self._queue.get()]
+                deadline = self._loop.time() + self.flush_interval
+                while len(batch) < self.batch_size:
+                    timeout = deadline - self._loop.time()
+                    if timeout <= 0:
+                        break
+                    try:
+                        batch.append(await asyncio.wait_for(self._queue.get(), timeout))
+                    except asyncio.TimeoutError:
+                        break
+                await self._write(batch)
+                batch = []
+        except asyncio.CancelledError:
+            # picked up again by the final flush in stop()
+            if batch:
+                self._spill(batch)
+            raise
+
+    async def _insert(self, rows):
+        async with self.engine.begin() as conn:
+            for i in range(0, len(rows), self.batch_size):
+                await conn.execute(insert(AuditLog), rows[i:i + self.batch_size])
+
+    async def _write(self, batch):
+        if batch:
+            try:
+                await self._insert(batch)
+            except Exception as e:
+                self.failed_flushes += 1
+                print(f"⚠️ Audit flush failed, spilling {len(batch)} rows: {e}")
+                self._spill(batch)
+                if not _is_row_error(e):
+                    return  # database unreachable; replaying now would fail too
+            else:
+                self.written += len(batch)
+        await self._replay_batch()
+
+    async def _replay_batch(self):
+        if not self._replay and not self._claim_spill():
+            return
+        rows = [self._replay[i] for i in range(min(self._replay_size, len(self._replay)))]
+        try:
+            await self._insert(rows)
+        except Exception as e:
+            if not _is_row_error(e):
+                return
+            if len(rows) > 1:
+                # narrow down to the rejected row over the next flushes
+                self._replay_size = max(len(rows) // 2, 1)
+                return
+            print(f"⚠️ Audit row quarantined: {e}")
+            self._append(self.quarantine_path, rows)
+            self.quarantined += 1
+        else:
+            self.written += len(rows)
+            self.replayed += len(rows)
+            self._replay_size = self.batch_size
+        for _ in rows:
+            self._replay.popleft()
+        if self._replay:
+            self._append(self.replay_path, list(self._replay), truncate=True)
+        else:
+            self._remove_replay_file()
+
+    # ---------- spill file ----------
+    @contextmanager
+    def _file_lock(self):
+        os.makedirs(os.path.dirname(self.spill_path) or ".", exist_ok=True)
+        with open(f"{self.spill_path}.lock", "a") as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    def _append(self, path, entries, truncate=False):
+        with self._file_lock():
+            os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+            with open(path, "w" if truncate else "a", encoding="utf-8") as f:
+                for entry in entries:
+                    f.write(json.dumps({**entry, "created_at": entry["created_at"].isoformat()}, default=str) + "\n")
+
+    def _spill(self, entries):
+        self._append(self.spill_path, entries)
+        self.spilled += len(entries)
+
+    def _claim_spill(self):
+        """Move the shared spill file to this worker's replay file and load it."""
+        with self._file_lock():
+            try:
+                os.replace(self.spill_path, self.replay_path)
+            except FileNotFoundError:
+                return False
+        with open(self.replay_path, encoding="utf-8") as f:
+            for line in f:
+                if not line.strip():
+                    continue
+                entry = json.loads(line)
+                entry["created_at"] = datetime.fromisoformat(entry["created_at"])
+                self._replay.append(entry)
+        return bool(self._replay)
+
+    def _remove_replay_file(self):
+        try:
+            os.remove(self.replay_path)
+        except FileNotFoundError:
+            pass
+
+    def _recover_orphans(self):
+        # replay files of workers that died mid-replay go back into the spill file
+        for path in glob.glob(f"{glob.escape(self.spill_path)}.*.replay"):
+            pid = path[len(self.spill_path) + 1:-len(".replay")]
+            if pid.isdigit() and int(pid) != os.getpid() and _pid_alive(int(pid)):
+                continue
+            with self._file_lock():
+                try:
+                    with open(path, encoding="utf-8") as src:
+                        data = src.read()
+                except FileNotFoundError:
+                    continue
+                with open(self.spill_path, "a", encoding="utf-8") as dest:
+                    dest.write(data)
+                os.remove(path)
+
+    def metrics(self):
+        return {
+            "queue_depth": self._queue.qsize() if self._queue is not None else 0,
+            "queue_size": self.queue_size,
+            "written": self.written,
+            "dropped": self.dropped,
+            "spilled": self.spilled,
+            "replayed": self.replayed,
+            "replay_backlog": len(self._replay),
+            "quarantined": self.quarantined,
+            "failed_flushes": self.failed_flushes,
+        }
+
+
+audit_writer = AuditWriter()
@@ -0,0 +1,189 @@
+import argparse
+import codecs
+import csv
+import json
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from sqlalchemy import func, insert, select
+from sqlalchemy.exc import SQLAlchemyError
+from models import User, Employee, UserRole, StatusEnum
+from services.audit_writer import audit_writer
+from services.hashing import hashing_executor
+
+# same field names as the /save_employee form
+REQUIRED_FIELDS = ("full_name", "email", "dob", "dept", "designation", "mobile", "salary", "joining_date")
+DEFAULT_CHUNK_SIZE = 1000
+
+
+def detect_format(filename, content_type=None):
+    name = (filename or "").lower()
+    if name.endswith((".ndjson", ".jsonl")) or content_type in ("application/x-ndjson", "application/jsonl"):
+        return "ndjson"
+    return "csv"
+
+
+def iter_records(binary_file, fmt):
+    # decoded line by line rather than through io.TextIOWrapper: UploadFile.file is a
+    # SpooledTemporaryFile, which on Python 3.10 lacks the readable() the wrapper needs
+    text = codecs.iterdecode(binary_file, "utf-8-sig")
+    if fmt == "ndjson":
+        for line_no, line in enumerate(text, start=1):
+            if not line.strip():
+                continue
+            try:
+                record = json.loads(line)
+            except ValueError as e:
+                yield line_no, None, f"Invalid JSON: {e}"
+                continue
+            if not isinstance(record, dict):
+                yield line_no, None, "Expected a JSON object"
+                continue
+            yield line_no, record, None
+    else:
+        reader = csv.DictReader(text)
+        for record in reader:
+            yield reader.line_num, record, None
+
+
+def clean_record(record):
+    missing = [f for f in REQUIRED_FIELDS if not str(record.get(f) or "").strip()]
+    if missing:
+        raise ValueError(f"Missing fields: {', '.join(missing)}")
+
+    row = {f: str(record[f]).strip() for f in REQUIRED_FIELDS}
+    row["email"] = row["email"].lower()
+    if "@" not in row["email"]:
+        raise ValueError("Invalid email")
+    try:
+        row["dob_date"] = date.fromisoformat(row["dob"])
+        row["joining_date"] = date.fromisoformat(row["joining_date"])
+    except ValueError:
+        raise ValueError("Dates must be YYYY-MM-DD")
+    try:
+        row["salary"] = Decimal(row["salary"])
+    except InvalidOperation:
+        raise ValueError("Invalid salary")
+    return row
+
+
+def _insert_chunk(db, chunk, actor_id, request, report):
+    emails = [row["email"] for _, row in chunk]
+    # clean_record lowercases the file's emails, but stored emails keep the case they were typed in
+    existing = set(db.scalars(select(func.lower(User.email)).where(func.lower(User.email).in_(emails))))
+
+    fresh = []
+    for line_no, row in chunk:
+        if row["email"] in existing:
+            report["errors"].append({"row": line_no, "email": row["email"], "error": "Already Registered!"})
+        else:
+            fresh.append((line_no, row))
+    if not fresh:
+        return
+
+    passwords = hashing_executor.hash_many([row["dob"] for _, row in fresh])
+
+    try:
+        user_ids = dict(db.execute(
+            insert(User).values([
+                {
+                    "full_name": row["full_name"],
+                    "email": row["email"],
+                    "password": hashed,
+                    "role": UserRole.Employee,
+                }
+                for (_, row), hashed in zip(fresh, passwords)
+            ]).returning(User.email, User.id)
+        ).all())
+
+        employee_ids = db.scalars(
+            insert(Employee).values([
+                {
+                    "phone": row["mobile"],
+                    "department": row["dept"],
+                    "designation": row["designation"],
+                    "salary": row["salary"],
+                    "hire_date": row["joining_date"],
+                    "dob": row["dob_date"],
+                    "status": StatusEnum.Y,
+                    "id_proof": "",
+                    "user_id": user_ids[row["email"]],
+                }
+                for _, row in fresh
+            ]).returning(Employee.id)
+        ).all()
+
+        db.commit()
+    except SQLAlchemyError as e:
+        db.rollback()
+        for line_no, row in fresh:
+            report["errors"].append({"row": line_no, "email": row["email"], "error": f"Database error: {e.__class__.__name__}"})
+        return
+
+    # one audit entry per chunk, written by the background audit writer
+    audit_writer.record(
+        user_id=actor_id,
+        action="BULK_CREATE",
+        module="EMPLOYEE",
+        record_id=None,
+        old_data=None,
+        new_data={"employee_ids": employee_ids, "emails": [row["email"] for _, row in fresh]},
+        request=request
+    )
+
+    report["inserted"] += len(employee_ids)
+
+
+def import_employees(db, records, actor_id=None, request=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    report = {"processed": 0, "inserted": 0, "errors": []}
+    seen = set()
+    chunk = []
+
+    for line_no, record, error in records:
+        report["processed"] += 1
+        if error is None:
+            try:
+                row = clean_record(record)
+            except ValueError as e:
+                error = str(e)
+        if error is None and row["email"] in seen:
+            error = "Duplicate email in file"
+        if error is not None:
+            report["errors"].append({"row": line_no, "email": (record or {}).get("email"), "error": error})
+            continue
+
+        seen.add(row["email"])
+        chunk.append((line_no, row))
+        if len(chunk) >= chunk_size:
+            _insert_chunk(db, chunk, actor_id, request, report)
+            chunk = []
+
+    if chunk:
+        _insert_chunk(db, chunk, actor_id, request, report)
+
+    report["failed"] = len(report["errors"])
+    return report
+
+
+def main():
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Bulk import employees from CSV or NDJSON")
+    parser.add_argument("path")
+    parser.add_argument("--format", choices=("csv", "ndjson"))
+    parser.add_argument("--chunk-size", type=int, default=DEFAULT_CHUNK_SIZE)
+    parser.add_argument("--actor-id", type=int, default=None, help="user id recorded in the audit log")
+    args = parser.parse_args()
+
+    fmt = args.format or detect_format(args.path)
+    db = SessionLocal()
+    try:
+        with open(args.path, "rb") as f:
+            report = import_employees(db, iter_records(f, fmt), actor_id=args.actor_id, chunk_size=args.chunk_size)
+    finally:
+        db.close()
+
+    print(json.dumps(report, indent=2, default=str))
+
+
+if __name__ == "__main__":
+    main()
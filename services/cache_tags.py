@@ -0,0 +1,63 @@
+import hashlib
+import json
+import os
+import time
+from urllib.parse import urlencode
+from anyio import from_thread
+from fastapi_cache import FastAPICache
+
+LISTING_CACHE_TTL = int(os.getenv("LISTING_CACHE_TTL", str(6 * 60 * 60)))
+SHARED_ROLES = ("Admin", "Super Admin")  # these roles see the same data, so they share entries
+IGNORED_PARAMS = {"_"}  # jQuery cache-buster
+
+
+def _tag_key(tag):
+    return f"{FastAPICache.get_prefix()}:tag:{tag}"
+
+
+async def tag_versions(tags):
+    backend = FastAPICache.get_backend()
+    versions = []
+    for tag in tags:
+        value = await backend.get(_tag_key(tag))
+        versions.append(value.decode() if isinstance(value, bytes) else str(value or 0))
+    return ".".join(versions)
+
+
+async def bump_tags(*tags):
+    # a new version makes every key built from the old one unreachable; those entries just expire
+    backend = FastAPICache.get_backend()
+    version = str(time.time_ns())
+    for tag in tags:
+        await backend.set(_tag_key(tag), version)
+
+
+def bump_tags_from_thread(*tags):
+    from_thread.run(bump_tags, *tags)
+
+
+async def identity_key(namespace, request, tags, ignore=()):
+    role = request.session.get("role")
+    user_id = None if role in SHARED_ROLES else request.session.get("user_id")
+    skip = IGNORED_PARAMS | set(ignore)
+    params = sorted((k, v) for k, v in request.query_params.multi_items() if k not in skip)
+    raw = f"{await tag_versions(tags)}|{role}|{user_id}|{urlencode(params)}"
+    return f"{FastAPICache.get_prefix()}:{namespace}:{hashlib.sha1(raw.encode()).hexdigest()}"
+
+
+async def cache_get_json(key):
+    value = await FastAPICache.get_backend().get(key)
+    return json.loads(value) if value else None
+
+
+async def cache_set_json(key, value, expire=LISTING_CACHE_TTL):
+    await FastAPICache.get_backend().set(key, json.dumps(value, default=str), expire)
+
+
+async def cache_get_text(key):
+    value = await FastAPICache.get_backend().get(key)
+    return value.decode() if isinstance(value, bytes) else value
+
+
+async def cache_set_text(key, value, expire=LISTING_CACHE_TTL):
+    await FastAPICache.get_backend().set(key, value, expire)
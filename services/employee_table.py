@@ -0,0 +1,131 @@
+import base64
+import binascii
+import json
+from datetime import date
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import func, or_, select, tuple_
+from models import Employee, User
+
+# DataTables column index -> sortable column (same order as templates/employee.html)
+SORT_COLUMNS = {
+    0: User.full_name,
+    1: User.email,
+    3: Employee.department,
+    4: Employee.designation,
+    5: Employee.salary,
+    6: Employee.hire_date,
+}
+MAX_PAGE_LENGTH = 100
+
+
+def parse_datatables_params(params):
+    try:
+        draw = int(params.get("draw", 0))
+        start = max(int(params.get("start", 0)), 0)
+        length = int(params.get("length", 10))
+        order_column = int(params.get("order[0][column]", -1))
+    except ValueError:
+        raise HTTPException(status_code=400, detail="Invalid paging parameters")
+
+    # DataTables sends -1 for "show all"; never hand out more than one page
+    if length < 1 or length > MAX_PAGE_LENGTH:
+        length = MAX_PAGE_LENGTH
+
+    return {
+        "draw": draw,
+        "start": start,
+        "length": length,
+        "order_column": order_column if order_column in SORT_COLUMNS else -1,
+        "order_dir": "desc" if params.get("order[0][dir]") == "desc" else "asc",
+        "search": params.get("search[value]", "").strip(),
+        "cursor": params.get("cursor"),
+    }
+
+
+def encode_cursor(paging, start, value, row_id):
+    if isinstance(value, (date, Decimal)):
+        value = str(value)
+    raw = json.dumps([paging["order_column"], paging["order_dir"], paging["search"], start, value, row_id])
+    return base64.urlsafe_b64encode(raw.encode()).decode()
+
+
+def decode_cursor(paging, column):
+    # A cursor is only usable for the exact page it was issued for; anything
+    # else (new sort, new search, jump to page N) falls back to OFFSET.
+    token = paging["cursor"]
+    if not token:
+        return None
+    try:
+        order_column, order_dir, search, start, value, row_id = json.loads(base64.urlsafe_b64decode(token))
+    except (ValueError, TypeError, binascii.Error):
+        return None
+
+    if (order_column, order_dir, search, start) != (paging["order_column"], paging["order_dir"], paging["search"], paging["start"]):
+        return None
+
+    if column is Employee.hire_date:
+        value = date.fromisoformat(value)
+    elif column is Employee.salary:
+        value = Decimal(value)
+    return value, row_id
+
+
+def _sort_value(column, emp, usr):
+    return getattr(emp if column.class_ is Employee else usr, column.key)
+
+
+async def get_employee_page(db, paging, user_id=None):
+    conditions = []
+    if user_id is not None:
+        conditions.append(Employee.user_id == user_id)
+
+    count_query = select(func.count(Employee.id)).select_from(Employee).join(User, Employee.user_id == User.id)
+    total = await db.scalar(count_query.where(*conditions))
+
+    filtered = total
+    if paging["search"]:
+        like = f"%{paging['search']}%"
+        conditions.append(or_(
+            User.full_name.ilike(like),
+            User.email.ilike(like),
+            Employee.department.ilike(like),
+            Employee.designation.ilike(like),
+        ))
+        filtered = await db.scalar(count_query.where(*conditions))
+
+    column = SORT_COLUMNS.get(paging["order_column"], Employee.id)
+    descending = paging["order_dir"] == "desc"
+    if column is Employee.id:
+        ordering = [Employee.id.desc() if descending else Employee.id.asc()]
+    elif descending:
+        ordering = [column.desc(), Employee.id.desc()]
+    else:
+        ordering = [column.asc(), Employee.id.asc()]
+
+    page_query = (
+        select(Employee, User)
+        .join(User, Employee.user_id == User.id)
+        .where(*conditions)
+        .order_by(*ordering)
+    )
+
+    key = decode_cursor(paging, column)
+    if key is not None:
+        if column is Employee.id:
+            page_query = page_query.where(Employee.id < key[1] if descending else Employee.id > key[1])
+        elif descending:
+            page_query = page_query.where(tuple_(column, Employee.id) < key)
+        else:
+            page_query = page_query.where(tuple_(column, Employee.id) > key)
+    else:
+        page_query = page_query.offset(paging["start"])
+
+    rows = (await db.execute(page_query.limit(paging["length"]))).all()
+
+    next_cursor = None
+    if len(rows) == paging["length"]:
+        emp, usr = rows[-1]
+        next_cursor = encode_cursor(paging, paging["start"] + len(rows), _sort_value(column, emp, usr), emp.id)
+
+    return rows, total, filtered, next_cursor
@@ -0,0 +1,189 @@
+import csv
+import io
+import os
+import re
+import zipfile
+from xml.sax.saxutils import escape
+from fastapi import HTTPException
+from sqlalchemy import select
+from models import Employee, User
+from services.zip_stream import ZipSink
+
+EXPORT_YIELD_PER = int(os.getenv("EXPORT_YIELD_PER", "1000"))
+FLUSH_ROWS = 500  # rows buffered before a chunk is sent
+
+# name -> (column, is_numeric)
+EXPORT_COLUMNS = {
+    "employee_id": (Employee.id, True),
+    "full_name": (User.full_name, False),
+    "email": (User.email, False),
+    "role": (User.role, False),
+    "phone": (Employee.phone, False),
+    "department": (Employee.department, False),
+    "designation": (Employee.designation, False),
+    "salary": (Employee.salary, True),
+    "hire_date": (Employee.hire_date, False),
+    "status": (Employee.status, False),
+    "created_on": (User.created_on, False),
+}
+DEFAULT_COLUMNS = ("employee_id", "full_name", "email", "phone", "department", "designation", "salary", "hire_date", "status")
+
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+def parse_columns(raw):
+    if not raw:
+        return DEFAULT_COLUMNS
+    names = tuple(dict.fromkeys(c.strip() for c in raw.split(",") if c.strip()))
+    unknown = [c for c in names if c not in EXPORT_COLUMNS]
+    if unknown or not names:
+        raise HTTPException(400, f"Unknown export columns: {', '.join(unknown)}. Allowed: {', '.join(EXPORT_COLUMNS)}")
+    return names
+
+
+def _text(value):
+    if value is None:
+        return ""
+    if hasattr(value, "value"):  # enums
+        value = value.value
+    if hasattr(value, "strftime"):
+        return value.strftime("%Y-%m-%d")
+    return str(value)
+
+
+def export_rows(db, columns, role=None, user_id=None):
+    """Selected columns of the Employee/User join, streamed from a server-side cursor.
+
+    Employees only get their own row, the same filtering as /employee/data.
+    """
+    stmt = (
+        select(*(EXPORT_COLUMNS[c][0] for c in columns))
+        .select_from(Employee)
+        .join(User, Employee.user_id == User.id)
+        .order_by(Employee.id)
+        .execution_options(yield_per=EXPORT_YIELD_PER)
+    )
+    if role == "Employee":
+        stmt = stmt.where(Employee.user_id == user_id)
+    for row in db.execute(stmt):
+        yield row
+
+
+def stream_csv(session_factory, columns, role=None, user_id=None):
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    writer.writerow(columns)
+    # header goes out before the query runs, so the download starts at once
+    yield buffer.getvalue().encode("utf-8")
+    buffer.seek(0)
+    buffer.truncate()
+
+    db = session_factory()
+    try:
+        for i, row in enumerate(export_rows(db, columns, role, user_id), 1):
+            writer.writerow([_text(v) for v in row])
+            if i % FLUSH_ROWS == 0:
+                yield buffer.getvalue().encode("utf-8")
+                buffer.seek(0)
+                buffer.truncate()
+    finally:
+        db.close()
+    yield buffer.getvalue().encode("utf-8")
+
+
+# Minimal SpreadsheetML package; the sheet uses inline strings so nothing
+# (like a shared string table) has to be held until the end
+_XLSX_PARTS = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/workbook.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="Employees" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    ),
+    "xl/styles.xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="1"><font><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="1"><fill><patternFill patternType="none"/></fill></fills>'
+        '<borders count="1"><border/></borders>'
+        '<cellStyleXfs count="1"><xf/></cellStyleXfs>'
+        '<cellXfs count="1"><xf xfId="0"/></cellXfs>'
+        '</styleSheet>'
+    ),
+}
+
+
+def _xlsx_row(values, numeric):
+    cells = []
+    for value, is_number in zip(values, numeric):
+        if value is None:
+            cells.append("<c/>")
+        elif is_number:
+            cells.append(f"<c><v>{value}</v></c>")
+        else:
+            text = escape(_XML_ILLEGAL.sub("", _text(value)))
+            cells.append(f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>')
+    return f"<row>{''.join(cells)}</row>"
+
+
+def stream_xlsx(session_factory, columns, role=None, user_id=None):
+    sink = ZipSink()
+    numeric = [EXPORT_COLUMNS[c][1] for c in columns]
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as archive:
+        for name, xml in _XLSX_PARTS.items():
+            archive.writestr(name, xml)
+        yield sink.drain()
+
+        db = session_factory()
+        try:
+            with archive.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+                sheet.write(
+                    b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                    b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                )
+                sheet.write(_xlsx_row(columns, [False] * len(columns)).encode("utf-8"))
+                batch = []
+                for row in export_rows(db, columns, role, user_id):
+                    batch.append(_xlsx_row(row, numeric))
+                    if len(batch) >= FLUSH_ROWS:
+                        sheet.write("".join(batch).encode("utf-8"))
+                        batch = []
+                        data = sink.drain()
+                        if data:
+                            yield data
+                batch.append("</sheetData></worksheet>")
+                sheet.write("".join(batch).encode("utf-8"))
+        finally:
+            db.close()
+    # the central directory is written when the archive closes
+    yield sink.drain()
+
+
+EXPORT_FORMATS = {
+    "csv": (stream_csv, "text/csv; charset=utf-8", "csv"),
+    "xlsx": (stream_xlsx, "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet", "xlsx"),
+}
@@ -0,0 +1,100 @@
+import mimetypes
+import os
+import re
+import aiofiles
+from fastapi import Request
+from fastapi.responses import FileResponse, Response, StreamingResponse
+
+CHUNK_SIZE = 64 * 1024
+_RANGE = re.compile(r"^bytes=(\d*)-(\d*)$")
+
+
+def file_etag(stat, content_hash=None):
+    # content-addressed files carry their own strong validator
+    if content_hash:
+        return f'"{content_hash}"'
+    return f'"{stat.st_mtime_ns:x}-{stat.st_size:x}"'
+
+
+def etag_matches(header, etag):
+    if not header:
+        return False
+    if header.strip() == "*":
+        return True
+    return etag in [tag.strip().removeprefix("W/") for tag in header.split(",")]
+
+
+def parse_range(header, size):
+    """Return (start, end) inclusive for a single satisfiable range, None to send the
+    whole file (absent, malformed or multi-range), or False if unsatisfiable."""
+    if not header:
+        return None
+    match = _RANGE.match(header.strip())
+    if not match:
+        return None
+    first, last = match.groups()
+    if not first and not last:
+        return None
+    if not first:
+        # suffix range: the last N bytes
+        length = int(last)
+        if length == 0:
+            return False
+        return max(size - length, 0), size - 1
+    start = int(first)
+    if last and int(last) < start:
+        return None  # syntactically invalid, so ignored
+    if start >= size:
+        return False
+    return start, min(int(last), size - 1) if last else size - 1
+
+
+async def _read_range(path, start, length):
+    async with aiofiles.open(path, "rb") as f:
+        await f.seek(start)
+        while length > 0:
+            chunk = await f.read(min(CHUNK_SIZE, length))
+            if not chunk:
+                break
+            length -= len(chunk)
+            yield chunk
+
+
+def serve_file(request: Request, path, media_type=None, content_hash=None, cache_control="private, no-cache", accel_path=None):
+    """Send a file with a strong ETag, 304s and single-range 206s.
+
+    Whole-file responses go through FileResponse, which uses the server's
+    zero-copy extension when it offers one. With accel_path set the body is
+    left to the fronting nginx (X-Accel-Redirect), which sendfile()s it and
+    handles Range itself.
+    """
+    stat = os.stat(path)
+    etag = file_etag(stat, content_hash)
+    media_type = media_type or mimetypes.guess_type(path)[0] or "application/octet-stream"
+    headers = {"ETag": etag, "Cache-Control": cache_control, "Accept-Ranges": "bytes"}
+
+    if etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers=headers)
+
+    if accel_path:
+        return Response(headers={**headers, "X-Accel-Redirect": accel_path}, media_type=media_type)
+
+    byte_range = parse_range(request.headers.get("range"), stat.st_size)
+    if_range = request.headers.get("if-range")
+    if byte_range is not None and if_range and if_range.strip() != etag:
+        # the client's partial copy is stale; send the whole file instead
+        byte_range = None
+
+    if byte_range is False:
+        return Response(status_code=416, headers={**headers, "Content-Range": f"bytes */{stat.st_size}"})
+
+    if byte_range is None:
+        return FileResponse(path, media_type=media_type, headers=headers, stat_result=stat)
+
+    start, end = byte_range
+    length = end - start + 1
+    headers.update({
+        "Content-Range": f"bytes {start}-{end}/{stat.st_size}",
+        "Content-Length": str(length),
+    })
+    return StreamingResponse(_read_range(path, start, length), status_code=206, media_type=media_type, headers=headers)
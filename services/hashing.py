@@ -0,0 +1,99 @@
+import asyncio
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from fastapi import HTTPException
+from utils import hash_password, verify_password
+
+HASH_POOL_SIZE = int(os.getenv("HASH_POOL_SIZE", os.cpu_count() or 2))
+# max hashes waiting or running at once; beyond this callers wait up to HASH_QUEUE_TIMEOUT
+HASH_QUEUE_LIMIT = int(os.getenv("HASH_QUEUE_LIMIT", HASH_POOL_SIZE * 8))
+HASH_QUEUE_TIMEOUT = float(os.getenv("HASH_QUEUE_TIMEOUT", "5"))
+
+
+class HashingExecutor:
+    """Runs bcrypt in a process pool so it never holds an event-loop or threadpool slot."""
+
+    def __init__(self, pool_size=HASH_POOL_SIZE, queue_limit=HASH_QUEUE_LIMIT, queue_timeout=HASH_QUEUE_TIMEOUT):
+        self.pool_size = pool_size
+        self.queue_limit = queue_limit
+        self.queue_timeout = queue_timeout
+        self._pool = None
+        self._slots = None
+        self.depth = 0
+        self.max_depth = 0
+        self.completed = 0
+        self.rejected = 0
+        self.latencies = deque(maxlen=1000)
+
+    @property
+    def pool(self):
+        if self._pool is None:
+            self._pool = ProcessPoolExecutor(max_workers=self.pool_size)
+        return self._pool
+
+    async def _run(self, fn, *args):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.queue_limit)
+
+        started = time.perf_counter()
+        try:
+            await asyncio.wait_for(self._slots.acquire(), timeout=self.queue_timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise HTTPException(status_code=503, detail="Server busy, please retry")
+
+        self.depth += 1
+        self.max_depth = max(self.max_depth, self.depth)
+        try:
+            return await asyncio.get_running_loop().run_in_executor(self.pool, fn, *args)
+        finally:
+            self.depth -= 1
+            self._slots.release()
+            self.completed += 1
+            self.latencies.append(time.perf_counter() - started)
+
+    async def hash(self, password):
+        return await self._run(hash_password, password)
+
+    async def verify(self, plain_password, hashed_password):
+        return await self._run(verify_password, plain_password, hashed_password)
+
+    def hash_many(self, passwords):
+        # blocking batch helper for CLI/threadpool callers such as the bulk import
+        return list(self.pool.map(hash_password, passwords, chunksize=16))
+
+    def metrics(self):
+        samples = sorted(self.latencies)
+
+        def pct(p):
+            return round(samples[min(int(len(samples) * p), len(samples) - 1)] * 1000, 2) if samples else None
+
+        return {
+            "pool_size": self.pool_size,
+            "queue_limit": self.queue_limit,
+            "queue_depth": self.depth,
+            "max_queue_depth": self.max_depth,
+            "completed": self.completed,
+            "rejected": self.rejected,
+            "latency_ms_p50": pct(0.50),
+            "latency_ms_p95": pct(0.95),
+            "latency_ms_p99": pct(0.99),
+        }
+
+    def shutdown(self):
+        if self._pool is not None:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+
+
+hashing_executor = HashingExecutor()
+
+
+async def hash_password_async(password: str):
+    return await hashing_executor.hash(password)
+
+
+async def verify_password_async(plain_password: str, hashed_password: str):
+    return await hashing_executor.verify(plain_password, hashed_password)
@@ -0,0 +1,204 @@
+import asyncio
+import json
+import os
+from openai import AsyncOpenAI, OpenAIError, RateLimitError
+from database import SessionLocal
+from services.hr_context import hr_context
+from services.answer_cache import answer_cache, normalize_question
+
+CHAT_MODEL = os.getenv("CHAT_MODEL", "gpt-3.5-turbo")
+CHAT_CONCURRENCY = int(os.getenv("CHAT_CONCURRENCY", "8"))
+CHAT_TIMEOUT = float(os.getenv("CHAT_TIMEOUT", "60"))
+CHAT_QUEUE_TIMEOUT = float(os.getenv("CHAT_QUEUE_TIMEOUT", "10"))
+
+
+class ChatBusy(Exception):
+    pass
+
+
+def error_message(error):
+    if isinstance(error, ChatBusy):
+        return "HR chat is busy right now. Please try again in a moment."
+    if isinstance(error, asyncio.TimeoutError):
+        return "Sorry, the answer took too long. Please try again."
+    if isinstance(error, RateLimitError):
+        return "Sorry, OpenAI API quota exceeded. Please try again later."
+    if isinstance(error, OpenAIError):
+        return f"OpenAI API error: {str(error)}"
+    return f"Unexpected error: {str(error)}"
+
+
+class _Broadcast:
+    """One upstream completion fanned out to every caller asking the same question."""
+
+    def __init__(self):
+        self.chunks = []
+        self.done = False
+        self.error = None
+        self.task = None
+        self._changed = asyncio.Condition()
+
+    async def publish(self, chunk):
+        async with self._changed:
+            self.chunks.append(chunk)
+            self._changed.notify_all()
+
+    async def finish(self, error=None):
+        async with self._changed:
+            self.done = True
+            self.error = error
+            self._changed.notify_all()
+
+    async def follow(self):
+        # late subscribers replay what has been produced so far, then follow live
+        offset = 0
+        while True:
+            async with self._changed:
+                await self._changed.wait_for(lambda: self.done or len(self.chunks) > offset)
+                chunks = self.chunks[offset:]
+                done, error = self.done, self.error
+            offset += len(chunks)
+            for chunk in chunks:
+                yield chunk
+            if done and offset == len(self.chunks):
+                if error is not None:
+                    raise error
+                return
+
+
+class HrChat:
+    """Async, streaming HR chat with a concurrency limit and in-flight coalescing.
+
+    At most CHAT_CONCURRENCY completions run upstream at once; callers wait up
+    to CHAT_QUEUE_TIMEOUT for a slot. Point OPENAI_BASE_URL at a local fake
+    completion server to run without the network.
+
+    hr_context is per process and writes don't update it, so before answering
+    the index is rebuilt if it predates the current data version; an answer is
+    never cached under a version newer than its prompt.
+    """
+
+    def __init__(self, concurrency=CHAT_CONCURRENCY, timeout=CHAT_TIMEOUT, queue_timeout=CHAT_QUEUE_TIMEOUT, model=CHAT_MODEL):
+        self.concurrency = concurrency
+        self.timeout = timeout
+        self.queue_timeout = queue_timeout
+        self.model = model
+        self._client = None
+        self._slots = None
+        self._inflight = {}
+        self._refresh_lock = None
+        self.counters = {"requests": 0, "coalesced": 0, "upstream_calls": 0, "rejected": 0, "timeouts": 0, "errors": 0, "context_rebuilds": 0}
+
+    @property
+    def client(self):
+        if self._client is None:
+            self._client = AsyncOpenAI(
+                api_key=os.getenv("OPENAI_API_KEY"),
+                base_url=os.getenv("OPENAI_BASE_URL") or None,
+                timeout=self.timeout,
+                max_retries=0,
+            )
+        return self._client
+
+    async def stream(self, question):
+        self.counters["requests"] += 1
+        version = await answer_cache.version()
+        await self._refresh_context(version)
+        cache_key = answer_cache.key(question, version)
+        cached = await answer_cache.get(cache_key)
+        if cached is not None:
+            yield cached
+            return
+
+        key = normalize_question(question)
+        broadcast = self._inflight.get(key)
+        if broadcast is None:
+            broadcast = self._inflight[key] = _Broadcast()
+            broadcast.task = asyncio.create_task(self._produce(key, broadcast, question, cache_key))
+        else:
+            self.counters["coalesced"] += 1
+        async for chunk in broadcast.follow():
+            yield chunk
+
+    async def _refresh_context(self, version):
+        if version is None or hr_context.data_version == version:
+            return
+        if self._refresh_lock is None:
+            self._refresh_lock = asyncio.Lock()
+        async with self._refresh_lock:
+            if hr_context.data_version == version:
+                return
+            await asyncio.to_thread(self._rebuild_context, version)
+            self.counters["context_rebuilds"] += 1
+
+    @staticmethod
+    def _rebuild_context(version):
+        db = SessionLocal()
+        try:
+            hr_context.rebuild(db, version)
+        finally:
+            db.close()
+
+    async def answer(self, question):
+        return "".join([chunk async for chunk in self.stream(question)])
+
+    async def _produce(self, key, broadcast, question, cache_key):
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.concurrency)
+        try:
+            try:
+                await asyncio.wait_for(self._slots.acquire(), self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.counters["rejected"] += 1
+                raise ChatBusy()
+            try:
+                self.counters["upstream_calls"] += 1
+                await asyncio.wait_for(self._complete(question, broadcast), self.timeout)
+            finally:
+                self._slots.release()
+        except Exception as e:
+            if isinstance(e, asyncio.TimeoutError):
+                self.counters["timeouts"] += 1
+            elif not isinstance(e, ChatBusy):
+                self.counters["errors"] += 1
+            await broadcast.finish(e)
+        else:
+            await answer_cache.put(cache_key, "".join(broadcast.chunks))
+            await broadcast.finish()
+        finally:
+            self._inflight.pop(key, None)
+
+    async def _complete(self, question, broadcast):
+        prompt = hr_context.build_prompt(question)
+        response = await self.client.chat.completions.create(
+            model=self.model,
+            messages=[{"role": "user", "content": prompt}],
+            temperature=0.7,
+            max_tokens=300,
+            stream=True,
+        )
+        async for event in response:
+            if event.choices and event.choices[0].delta.content:
+                await broadcast.publish(event.choices[0].delta.content)
+
+    def metrics(self):
+        return {
+            **self.counters,
+            "in_flight": len(self._inflight),
+            "concurrency": self.concurrency,
+            "answer_cache": answer_cache.metrics(),
+        }
+
+
+async def sse_events(chunks):
+    """Wrap a text chunk stream as server-sent events: a delta per chunk, then done or error."""
+    try:
+        async for chunk in chunks:
+            yield f"data: {json.dumps({'delta': chunk})}\n\n"
+    except Exception as e:
+        yield f"event: error\ndata: {json.dumps({'message': error_message(e)})}\n\n"
+        return
+    yield "event: done\ndata: {}\n\n"
+
+
+hr_chat = HrChat()
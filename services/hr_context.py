@@ -0,0 +1,213 @@
+import math
+import os
+import re
+import statistics
+import threading
+import time
+from collections import Counter, defaultdict
+from models import User, Employee
+
+HR_CONTEXT_TOKENS = int(os.getenv("HR_CONTEXT_TOKENS", "1500"))
+HR_CONTEXT_MAX_ROWS = int(os.getenv("HR_CONTEXT_MAX_ROWS", "40"))
+
+# BM25 parameters
+K1 = 1.5
+B = 0.75
+
+STOPWORDS = {
+    "a", "an", "the", "is", "are", "was", "were", "of", "in", "on", "at", "to", "for", "and", "or",
+    "who", "what", "which", "how", "many", "much", "do", "does", "we", "our", "us", "have", "has",
+    "me", "tell", "list", "show", "give", "with", "by", "there", "any", "all", "employees", "employee",
+    "people", "staff", "work", "works", "working", "salary", "salaries", "paid", "pay",
+}
+AGGREGATE_WORDS = {
+    "how", "many", "count", "number", "total", "average", "avg", "mean", "median",
+    "highest", "lowest", "max", "min", "maximum", "minimum", "sum", "headcount", "breakdown",
+}
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def _words(text):
+    return _WORD.findall((text or "").lower())
+
+
+def estimate_tokens(text):
+    # ~4 characters per token for English text; close enough for budgeting
+    return len(text) // 4 + 1
+
+
+def _fmt(value):
+    return f"{value:,.2f}"
+
+
+def _summary(label, salaries):
+    return (
+        f"{label}: {len(salaries)} employees, salary avg {_fmt(statistics.fmean(salaries))}, "
+        f"median {_fmt(statistics.median(salaries))}, min {_fmt(min(salaries))}, "
+        f"max {_fmt(max(salaries))}, total {_fmt(sum(salaries))}"
+    )
+
+
+class HrContextIndex:
+    """Retrieval stage for the HR chat.
+
+    Keeps a BM25 index over employee rows (name, department, designation) and
+    salary aggregates per department and designation, and builds a prompt
+    holding only what is relevant to the question within a token budget.
+    Writes don't touch it: HrChat rebuilds it before answering whenever the
+    employees/users data version has moved past data_version.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self.last_rebuild_seconds = None
+        self.data_version = None  # tag version the last rebuild was read at, if known
+
+    def _clear(self):
+        self.docs = {}                       # employee_id -> row dict
+        self.postings = defaultdict(dict)    # term -> {employee_id: tf}
+        self.lengths = {}
+        self.total_length = 0
+        self._aggregates = None
+
+    # ---------- maintenance ----------
+    def rebuild(self, db, version=None):
+        started = time.perf_counter()
+        rows = db.query(Employee, User).join(User, Employee.user_id == User.id).all()
+        with self._lock:
+            self._clear()
+            for emp, user in rows:
+                self._add(self._doc(user, emp))
+            self.data_version = version
+        self.last_rebuild_seconds = time.perf_counter() - started
+
+    def _doc(self, user, emp):
+        return {
+            "employee_id": emp.id,
+            "user_id": user.id,
+            "full_name": user.full_name,
+            "department": emp.department,
+            "designation": emp.designation,
+            "salary": float(emp.salary or 0),
+        }
+
+    def _terms(self, doc):
+        return _words(f"{doc['full_name']} {doc['department']} {doc['designation']}")
+
+    def _add(self, doc):
+        terms = Counter(self._terms(doc))
+        emp_id = doc["employee_id"]
+        self.docs[emp_id] = doc
+        for term, tf in terms.items():
+            self.postings[term][emp_id] = tf
+        length = sum(terms.values())
+        self.lengths[emp_id] = length
+        self.total_length += length
+        self._aggregates = None
+
+    # ---------- aggregates ----------
+    def aggregates(self):
+        with self._lock:
+            if self._aggregates is None:
+                by_department = defaultdict(list)
+                by_designation = defaultdict(list)
+                for doc in self.docs.values():
+                    by_department[doc["department"] or "Unassigned"].append(doc["salary"])
+                    by_designation[doc["designation"] or "Unassigned"].append(doc["salary"])
+                self._aggregates = {
+                    "overall": [d["salary"] for d in self.docs.values()],
+                    "department": dict(by_department),
+                    "designation": dict(by_designation),
+                }
+            return self._aggregates
+
+    # ---------- retrieval ----------
+    def search(self, terms, limit=HR_CONTEXT_MAX_ROWS):
+        with self._lock:
+            n = len(self.docs)
+            if not n or not terms:
+                return []
+            avgdl = self.total_length / n
+            scores = defaultdict(float)
+            for term in set(terms):
+                postings = self.postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+                for emp_id, tf in postings.items():
+                    norm = K1 * (1 - B + B * self.lengths[emp_id] / avgdl)
+                    scores[emp_id] += idf * tf * (K1 + 1) / (tf + norm)
+            ranked = sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:limit]
+            return [self.docs[emp_id] for emp_id, _ in ranked]
+
+    def _mentioned(self, groups, question_words, question_text):
+        # a group is mentioned if its full name appears, or all of its words do
+        hits = []
+        for name in groups:
+            words = _words(name)
+            if words and (" ".join(words) in question_text or set(words) <= question_words):
+                hits.append(name)
+        return hits
+
+    def build_context(self, question, token_budget=HR_CONTEXT_TOKENS):
+        words = _words(question)
+        question_words = set(words)
+        question_text = " ".join(words)
+        terms = [w for w in words if w not in STOPWORDS]
+        aggregates = self.aggregates()
+
+        sections = []
+        if aggregates["overall"]:
+            sections.append(_summary(
+                f"Whole company ({len(aggregates['department'])} departments)", aggregates["overall"]
+            ))
+
+        departments = self._mentioned(aggregates["department"], question_words, question_text)
+        designations = self._mentioned(aggregates["designation"], question_words, question_text)
+        sections += [_summary(f"Department {d}", aggregates["department"][d]) for d in departments]
+        sections += [_summary(f"Designation {d}", aggregates["designation"][d]) for d in designations]
+
+        if question_words & AGGREGATE_WORDS and not (departments or designations):
+            # a company-wide breakdown question: per-group summaries answer it better than rows
+            sections += [_summary(f"Department {d}", s) for d, s in sorted(aggregates["department"].items())]
+            sections += [_summary(f"Designation {d}", s) for d, s in sorted(aggregates["designation"].items())]
+
+        rows = [
+            f"{r['full_name']} is a {r['designation']} in {r['department']} with salary {_fmt(r['salary'])}"
+            for r in self.search(terms)
+        ]
+
+        lines, used = [], 0
+        for line in sections + rows:
+            cost = estimate_tokens(line)
+            if used + cost > token_budget:
+                break
+            lines.append(line)
+            used += cost
+        return lines
+
+    def build_prompt(self, question, token_budget=HR_CONTEXT_TOKENS):
+        context = "\n".join(self.build_context(question, token_budget)) or "No employee data matched."
+        return (
+            "Here is the relevant employee data. Summary lines cover every employee; "
+            "individual lines are only the employees matching the question.\n"
+            f"{context}\n\nAnswer the following question based on this data: {question}"
+        )
+
+    def stats(self):
+        with self._lock:
+            return {
+                "documents": len(self.docs),
+                "terms": len(self.postings),
+                "last_rebuild_seconds": self.last_rebuild_seconds,
+            }
+
+
+def answer_question(question, llm, index=None):
+    """Build the retrieval prompt for question and pass it to llm (any callable taking a prompt)."""
+    return llm((index or hr_context).build_prompt(question))
+
+
+hr_context = HrContextIndex()
@@ -0,0 +1,204 @@
+import asyncio
+import hashlib
+import os
+import re
+import shutil
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+import aiofiles
+import aiofiles.os
+from PIL import Image
+from sqlalchemy import select, func
+from models import Employee
+
+# outside /static: proofs are only served through the access-checked /id-proofs endpoint
+ID_PROOF_DIR = os.getenv("ID_PROOF_DIR", "uploads/idproofs")
+LEGACY_ID_PROOF_DIR = "static/uploads/idproofs"
+THUMBNAIL_SIZE = (320, 320)
+THUMBNAIL_WORKERS = int(os.getenv("THUMBNAIL_WORKERS", "2"))
+CHUNK_SIZE = 64 * 1024
+# first key of the two-key advisory lock that serializes claiming and releasing a blob
+ADVISORY_LOCK_NAMESPACE = 0x1D9F
+
+_SHA256_NAME = re.compile(r"^([0-9a-f]{64})\.[a-z0-9]+$")
+_VALID_NAME = re.compile(r"^[A-Za-z0-9_-]+\.[A-Za-z0-9]+$")
+
+EXTENSIONS = {
+    "image/png": ".png",
+    "image/jpeg": ".jpg",
+    "image/jpg": ".jpg",
+    "image/gif": ".gif",
+    "application/pdf": ".pdf",
+}
+
+
+class FileTooLarge(Exception):
+    pass
+
+
+def thumbnail_name(name):
+    return os.path.splitext(name)[0] + ".jpg"
+
+
+def make_thumbnail(src, dest, size=THUMBNAIL_SIZE):
+    with Image.open(src) as img:
+        img.thumbnail(size)
+        if img.mode not in ("RGB", "L"):
+            img = img.convert("RGB")
+        tmp = f"{dest}.{uuid.uuid4().hex}.tmp"
+        img.save(tmp, "JPEG", quality=70, optimize=True)
+    os.replace(tmp, dest)
+
+
+class IdProofStore:
+    """Content-addressed ID proof storage.
+
+    Blobs are named by the sha256 of their content, so the same file uploaded
+    again (or for another employee) is stored once. A blob's reference count
+    is the number of employees pointing at it; it is deleted when that drops
+    to zero. Claiming a blob in save() and counting-then-deleting it in
+    release() both hold a transaction-scoped advisory lock on the blob name,
+    so a blob cannot be released between a deduplicated upload and the commit
+    that references it. Image proofs get a small JPEG preview generated off the event loop.
+    """
+
+    def __init__(self, root=ID_PROOF_DIR, thumbnail_workers=THUMBNAIL_WORKERS):
+        self.root = root
+        self.thumbnail_dir = os.path.join(root, "thumbs")
+        self.thumbnail_workers = thumbnail_workers
+        self._executor = None
+        self._pending = set()
+        self.counters = {"uploads": 0, "deduplicated": 0, "bytes_saved": 0, "released": 0, "thumbnails": 0, "thumbnail_failures": 0}
+
+    @staticmethod
+    def is_valid_name(name):
+        return bool(name and _VALID_NAME.match(name))
+
+    @staticmethod
+    def content_hash(name):
+        match = _SHA256_NAME.match(name or "")
+        return match.group(1) if match else None
+
+    def migrate_legacy(self, legacy_dir=LEGACY_ID_PROOF_DIR):
+        """Move proofs uploaded before the store left /static; returns how many moved."""
+        if not os.path.isdir(legacy_dir) or os.path.abspath(legacy_dir) == os.path.abspath(self.root):
+            return 0
+        moved = 0
+        for src, dest in ((legacy_dir, self.root), (os.path.join(legacy_dir, "thumbs"), self.thumbnail_dir)):
+            if not os.path.isdir(src):
+                continue
+            os.makedirs(dest, exist_ok=True)
+            for entry in os.scandir(src):
+                if entry.is_file() and not os.path.exists(os.path.join(dest, entry.name)):
+                    shutil.move(entry.path, os.path.join(dest, entry.name))
+                    moved += 1
+        return moved
+
+    def path(self, name):
+        return os.path.join(self.root, os.path.basename(name))
+
+    def thumbnail_path(self, name):
+        return os.path.join(self.thumbnail_dir, thumbnail_name(os.path.basename(name)))
+
+    async def _lock(self, db, name):
+        await db.execute(select(func.pg_advisory_xact_lock(ADVISORY_LOCK_NAMESPACE, func.hashtext(name))))
+
+    async def save(self, db, upload, content_type, max_size):
+        """Stream upload to disk, hashing as it goes; returns the stored blob name.
+
+        The blob stays locked until db's transaction ends, so commit the new
+        reference in that same transaction.
+        """
+        os.makedirs(self.root, exist_ok=True)
+        ext = EXTENSIONS.get(content_type) or os.path.splitext(upload.filename or "")[1].lower()
+        tmp_path = os.path.join(self.root, f".upload-{uuid.uuid4().hex}.tmp")
+        digest = hashlib.sha256()
+        total = 0
+        try:
+            async with aiofiles.open(tmp_path, "wb") as buffer:
+                while True:
+                    chunk = await upload.read(CHUNK_SIZE)
+                    if not chunk:
+                        break
+                    total += len(chunk)
+                    if total > max_size:
+                        raise FileTooLarge()
+                    digest.update(chunk)
+                    await buffer.write(chunk)
+
+            name = f"{digest.hexdigest()}{ext}"
+            dest = self.path(name)
+            await self._lock(db, name)
+            self.counters["uploads"] += 1
+            if await aiofiles.os.path.exists(dest):
+                self.counters["deduplicated"] += 1
+                self.counters["bytes_saved"] += total
+                await aiofiles.os.remove(tmp_path)
+            else:
+                await aiofiles.os.replace(tmp_path, dest)
+        except BaseException:
+            try:
+                await aiofiles.os.remove(tmp_path)
+            except FileNotFoundError:
+                pass
+            raise
+
+        if content_type.startswith("image/"):
+            self.schedule_thumbnail(name)
+        return name
+
+    # ---------- references ----------
+    async def references(self, db, name):
+        return await db.scalar(select(func.count(Employee.id)).where(Employee.id_proof == name))
+
+    async def release(self, db, name):
+        """Drop a blob no employee points at any more; call after the new reference is committed."""
+        if not name:
+            return False
+        try:
+            await self._lock(db, name)
+            if await self.references(db, name):
+                return False
+            for path in (self.path(name), self.thumbnail_path(name)):
+                try:
+                    await aiofiles.os.remove(path)
+                except FileNotFoundError:
+                    pass
+        finally:
+            # ends the transaction, releasing the lock
+            await db.commit()
+        self.counters["released"] += 1
+        return True
+
+    # ---------- thumbnails ----------
+    def has_thumbnail(self, name):
+        return os.path.exists(self.thumbnail_path(name))
+
+    def schedule_thumbnail(self, name):
+        if self.has_thumbnail(name):
+            return
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(max_workers=self.thumbnail_workers, thread_name_prefix="thumbnail")
+        task = asyncio.get_running_loop().run_in_executor(self._executor, self._thumbnail, name)
+        self._pending.add(task)
+        task.add_done_callback(self._pending.discard)
+
+    def _thumbnail(self, name):
+        os.makedirs(self.thumbnail_dir, exist_ok=True)
+        try:
+            make_thumbnail(self.path(name), self.thumbnail_path(name))
+            self.counters["thumbnails"] += 1
+        except Exception as e:
+            self.counters["thumbnail_failures"] += 1
+            print(f"⚠️ Thumbnail for {name} failed: {e}")
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+
+    def metrics(self):
+        return {**self.counters, "pending_thumbnails": len(self._pending)}
+
+
+id_proof_store = IdProofStore()
@@ -0,0 +1,64 @@
+import orjson
+from fastapi.responses import Response
+
+# Compact listing format: {"columns": [...], "can": {...}, "rows": [[...], ...]}.
+# Rows hold raw values only; the page renders buttons from the capability flags.
+EMPLOYEE_COLUMNS = ("id", "full_name", "email", "phone", "department", "designation", "salary", "hire_date", "status", "id_proof")
+USER_COLUMNS = ("id", "full_name", "email", "role", "created_on", "status")
+
+
+def is_compact(request):
+    return request.query_params.get("format") == "compact"
+
+
+def employee_values(emp, usr):
+    return [
+        emp.id,
+        usr.full_name,
+        usr.email,
+        emp.phone,
+        emp.department,
+        emp.designation,
+        str(emp.salary) if emp.salary is not None else None,
+        emp.hire_date.strftime("%Y-%m-%d") if emp.hire_date else None,
+        emp.status,
+        emp.id_proof or None,
+    ]
+
+
+def user_values(usr):
+    return [
+        usr.id,
+        usr.full_name,
+        usr.email,
+        usr.role.value if hasattr(usr.role, "value") else usr.role,
+        # declared as String; the column holds a date in existing databases
+        usr.created_on.strftime("%Y-%m-%d") if hasattr(usr.created_on, "strftime") else usr.created_on,
+        usr.status,
+    ]
+
+
+def employee_capabilities(role):
+    manage = role != "Employee"
+    return {"edit": manage, "toggle_status": manage, "upload": True, "preview": True, "salary_slip": True}
+
+
+def user_capabilities():
+    # same for every role, like the buttons on the HTML listing
+    return {"edit": True, "toggle_status": True}
+
+
+def compact_page(columns, can, rows, **extra):
+    return {**extra, "columns": columns, "can": can, "rows": rows}
+
+
+def dumps(page):
+    return orjson.dumps(page)
+
+
+def json_response(body, draw=None):
+    """Send pre-serialized JSON; draw (DataTables' request counter) is spliced in
+    front so a cached body can be reused for every draw."""
+    if draw is not None:
+        body = b'{"draw":%d,' % draw + body[1:] if body != b"{}" else b'{"draw":%d}' % draw
+    return Response(content=body, media_type="application/json")
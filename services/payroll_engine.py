@@ -0,0 +1,111 @@
+from decimal import Decimal
+import numpy as np
+from utils import breakup_salary
+
+# 1 rupee = 10,000 units (1/100 paise). With gross salaries in whole paise every
+# rule in utils.breakup_salary (50%, 20%, 20%, 12% of basic) stays an integer.
+SCALE = 10_000
+PROFESSIONAL_TAX = 200 * SCALE
+# per-row cap so sums over 10 million rows stay within int64 (about 9.2 crore rupees)
+MAX_PAISE = np.iinfo(np.int64).max // (SCALE // 100) // 10_000_000
+COMPONENTS = ("gross", "basic", "hra", "special", "pf", "pt", "total_earnings", "total_deductions", "net_salary")
+
+
+def to_units(salaries):
+    """Split salaries into int64 units and the positions that need Decimal.
+
+    Returns (positions, units, fallback): units[k] is salaries[positions[k]];
+    fallback lists salaries with fractional paise or too large for int64
+    headroom, which payroll_summary runs through utils.breakup_salary instead.
+    """
+    positions, units, fallback = [], [], []
+    for i, salary in enumerate(salaries):
+        paise = Decimal(salary) * 100
+        if paise == paise.to_integral_value() and abs(paise) <= MAX_PAISE:
+            positions.append(i)
+            units.append(int(paise) * (SCALE // 100))
+        else:
+            fallback.append(i)
+    return positions, np.array(units, dtype=np.int64), fallback
+
+
+def from_units(value):
+    return Decimal(int(value)).scaleb(-4)
+
+
+def compute_breakup(gross):
+    """Vectorised utils.breakup_salary over an int64 array of gross salaries in units."""
+    basic = gross * 50 // 100
+    hra = gross * 20 // 100
+    special = gross * 20 // 100
+    pf = basic * 12 // 100
+    pt = np.full_like(gross, PROFESSIONAL_TAX)
+    total_earnings = basic + hra + special
+    total_deductions = pf + pt
+    return {
+        "gross": gross,
+        "basic": basic,
+        "hra": hra,
+        "special": special,
+        "pf": pf,
+        "pt": pt,
+        "total_earnings": total_earnings,
+        "total_deductions": total_deductions,
+        "net_salary": total_earnings - total_deductions,
+    }
+
+
+def summarize(keys, breakup):
+    """Per-group headcount and component totals in units; integer sums, so exact."""
+    if not len(keys):
+        return {}
+    groups, inverse = np.unique(np.asarray(keys, dtype=object), return_inverse=True)
+    headcount = np.bincount(inverse, minlength=len(groups))
+    totals = {}
+    for name in COMPONENTS:
+        sums = np.zeros(len(groups), dtype=np.int64)
+        np.add.at(sums, inverse, breakup[name])
+        totals[name] = sums
+    return {
+        group: {"headcount": int(headcount[i]), **{name: from_units(totals[name][i]) for name in COMPONENTS}}
+        for i, group in enumerate(groups)
+    }
+
+
+def _add_exact(groups, key, salary):
+    # utils.breakup_salary itself, for the rare salary the unit scale can't hold
+    gross = Decimal(salary)
+    breakup = {"gross": gross, **breakup_salary(gross)}
+    group = groups.setdefault(key, {"headcount": 0, **{name: Decimal(0) for name in COMPONENTS}})
+    group["headcount"] += 1
+    for name in COMPONENTS:
+        group[name] += breakup[name]
+
+
+def payroll_summary(rows, group_by=("department",)):
+    """rows: iterable of (department, designation, salary) tuples."""
+    rows = list(rows)
+    if not rows:
+        return {"groups": [], "totals": None}
+
+    departments, designations, salaries = zip(*rows)
+    columns = {"department": departments, "designation": designations}
+    if len(group_by) == 1:
+        keys = columns[group_by[0]]
+    else:
+        keys = [" / ".join(parts) for parts in zip(*(columns[g] for g in group_by))]
+
+    positions, units, fallback = to_units(salaries)
+    groups = summarize([keys[i] for i in positions], compute_breakup(units))
+    for i in fallback:
+        _add_exact(groups, keys[i], salaries[i])
+
+    totals = {"headcount": len(rows), **{name: sum((g[name] for g in groups.values()), Decimal(0)) for name in COMPONENTS}}
+    return {
+        "group_by": list(group_by),
+        "groups": [
+            {"group": key, "headcount": group["headcount"], **{name: str(group[name]) for name in COMPONENTS}}
+            for key, group in sorted(groups.items())
+        ],
+        "totals": {k: v if k == "headcount" else str(v) for k, v in totals.items()},
+    }
@@ -0,0 +1,310 @@
+import argparse
+import fcntl
+import json
+import multiprocessing
+import os
+import re
+import threading
+import time
+import weakref
+import zipfile
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+from concurrent.futures.process import BrokenProcessPool
+from decimal import Decimal
+from types import SimpleNamespace
+from sqlalchemy import func, select
+from models import Employee, User, StatusEnum
+from utils import breakup_salary, SALARY_RULES_VERSION
+from services.slip_cache import slip_cache, slip_cache_key
+from services.slip_renderer import render_salary_slip
+from services.zip_stream import ZipSink
+
+PAYROLL_WORKERS = int(os.getenv("PAYROLL_WORKERS", os.cpu_count() or 2))
+PAYROLL_YIELD_PER = int(os.getenv("PAYROLL_YIELD_PER", "500"))
+PAYROLL_STATE_DIR = os.getenv("PAYROLL_STATE_DIR", ".cache/payroll_runs")
+
+_RUN_ID = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
+
+class RunInProgress(Exception):
+    pass
+
+
+def is_valid_run_id(run_id):
+    return bool(run_id and _RUN_ID.match(run_id))
+
+
+def _state_path(run_id, suffix=".json"):
+    if not is_valid_run_id(run_id):
+        raise ValueError(f"Invalid payroll run id: {run_id!r}")
+    return os.path.join(PAYROLL_STATE_DIR, f"{run_id}{suffix}")
+
+
+def render_slip_job(job):
+    # Runs in a worker process; takes and returns plain data only
+    employee = SimpleNamespace(**job["employee"])
+    user = SimpleNamespace(full_name=job["full_name"])
+    cached = slip_cache.get(job["key"])
+    if cached is not None:
+        with open(cached, "rb") as f:
+            return job["employee"]["id"], f.read()
+
+    employee.salary = Decimal(employee.salary)
+    pdf = render_salary_slip(employee, user, breakup_salary(employee.salary)).getvalue()
+    slip_cache.put(job["key"], pdf)
+    return job["employee"]["id"], pdf
+
+
+class RenderPool:
+    """Long-lived process pool for slip rendering, shared by every run in this process.
+
+    Workers come from a forkserver (spawn where unavailable), not fork(), so
+    they never inherit the threads and connections of the web worker.
+    """
+
+    def __init__(self, workers=PAYROLL_WORKERS):
+        self.workers = workers
+        self._pool = None
+        self._lock = threading.Lock()
+
+    @property
+    def pool(self):
+        with self._lock:
+            if self._pool is None:
+                methods = multiprocessing.get_all_start_methods()
+                context = multiprocessing.get_context("forkserver" if "forkserver" in methods else "spawn")
+                self._pool = ProcessPoolExecutor(max_workers=self.workers, mp_context=context)
+            return self._pool
+
+    def start(self):
+        return self.pool
+
+    def discard(self, pool):
+        # a broken pool (a worker died) is replaced on next use
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+
+render_pool = RenderPool()
+
+
+class PayrollRun:
+    """One resumable run; its state file is keyed by run_id, so a run_id is
+    only ever streamed by one process at a time.
+
+    The flock on run_id.lock is taken when the run is created and held until
+    stream_zip finishes, or until the run is garbage collected if its response
+    never starts streaming.
+    """
+
+    def __init__(self, period, run_id=None):
+        self.period = period
+        self.run_id = run_id or f"payroll-{period}"
+        self.state_path = _state_path(self.run_id)
+        self.lock_path = _state_path(self.run_id, ".lock")
+        self._release = self._acquire()
+        self.state = self._load_state()
+
+    def _acquire(self):
+        os.makedirs(PAYROLL_STATE_DIR, exist_ok=True)
+        f = open(self.lock_path, "w")
+        try:
+            fcntl.flock(f, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except BlockingIOError:
+            f.close()
+            raise RunInProgress(self.run_id)
+        # closing the file drops the flock
+        return weakref.finalize(self, f.close)
+
+    def release(self):
+        self._release()
+
+    def _load_state(self):
+        try:
+            with open(self.state_path, encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            state = {}
+        if state.get("period") != self.period:
+            state = {"run_id": self.run_id, "period": self.period, "completed": [], "failed": {}}
+        state.update({"status": "pending", "total": None, "done": 0, "cached": 0})
+        return state
+
+    def _save_state(self):
+        os.makedirs(PAYROLL_STATE_DIR, exist_ok=True)
+        tmp_path = f"{self.state_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(self.state, f)
+        os.replace(tmp_path, self.state_path)
+
+    def progress(self):
+        return {k: v for k, v in self.state.items() if k != "completed"} | {"completed": len(self.state["completed"])}
+
+    def _jobs(self, db):
+        stmt = (
+            select(Employee, User)
+            .join(User, Employee.user_id == User.id)
+            .where(Employee.status == StatusEnum.Y, Employee.salary.isnot(None))
+            .order_by(Employee.id)
+            .execution_options(yield_per=PAYROLL_YIELD_PER)
+        )
+        for emp, user in db.execute(stmt):
+            yield {
+                "key": slip_cache_key(emp, user, SALARY_RULES_VERSION, self.period),
+                "full_name": user.full_name,
+                "employee": {
+                    "id": emp.id,
+                    "department": emp.department,
+                    "designation": emp.designation,
+                    "salary": str(emp.salary),
+                },
+            }
+
+    def stream_zip(self, session_factory, render_pool=render_pool):
+        completed = set(self.state["completed"])
+        pool = None
+        pending = set()
+        db = session_factory()
+        try:
+            self.state["total"] = db.scalar(
+                select(func.count(Employee.id)).where(Employee.status == StatusEnum.Y, Employee.salary.isnot(None))
+            )
+            self.state["status"] = "running"
+            self._save_state()
+
+            sink = ZipSink()
+            names = {}
+            pool = render_pool.pool
+            with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_STORED) as archive:
+                owners = {}
+                window = render_pool.workers * 4  # bounds slips held in memory
+                last_saved = time.monotonic()
+
+                def collect(done):
+                    nonlocal last_saved
+                    for future in done:
+                        emp_id = owners.pop(future)
+                        try:
+                            _, pdf = future.result()
+                        except Exception as e:
+                            self.state["failed"][str(emp_id)] = str(e)
+                            continue
+                        archive.writestr(f"{self.period}/salary_slip_{emp_id}_{names.pop(emp_id)}.pdf", pdf)
+                        if emp_id in completed:
+                            self.state["cached"] += 1
+                        else:
+                            completed.add(emp_id)
+                            self.state["completed"].append(emp_id)
+                        self.state["done"] += 1
+                    if time.monotonic() - last_saved > 2:
+                        self._save_state()
+                        last_saved = time.monotonic()
+
+                for job in self._jobs(db):
+                    emp_id = job["employee"]["id"]
+                    names[emp_id] = "".join(ch if ch.isalnum() else "_" for ch in job["full_name"])
+                    future = pool.submit(render_slip_job, job)
+                    owners[future] = emp_id
+                    pending.add(future)
+                    if len(pending) >= window:
+                        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                        collect(done)
+                        data = sink.drain()
+                        if data:
+                            yield data
+
+                while pending:
+                    done, pending = wait(pending, return_when=FIRST_COMPLETED)
+                    collect(done)
+                    data = sink.drain()
+                    if data:
+                        yield data
+
+            # central directory is written when the archive closes
+            yield sink.drain()
+            self.state["status"] = "completed"
+        except BaseException as e:
+            self.state["status"] = "interrupted"
+            if isinstance(e, BrokenProcessPool) and pool is not None:
+                render_pool.discard(pool)
+            raise
+        finally:
+            # the pool outlives the run; don't leave its slips rendering for nobody
+            for future in pending:
+                future.cancel()
+            self._save_state()
+            db.close()
+            self.release()
+
+
+# live runs only: an entry goes away with its response, and finished runs are
+# read back from their state file
+_runs = weakref.WeakValueDictionary()
+_runs_lock = threading.Lock()
+
+
+def start_run(period, run_id=None):
+    """Lock and register a run; raises ValueError for a malformed run_id and
+    RunInProgress if that run_id is already streaming."""
+    run = PayrollRun(period, run_id)
+    with _runs_lock:
+        _runs[run.run_id] = run
+    return run
+
+
+def get_run_progress(run_id):
+    with _runs_lock:
+        run = _runs.get(run_id)
+    if run is not None:
+        return run.progress()
+    if not is_valid_run_id(run_id):
+        return None
+    # finished or started by another worker / the CLI
+    try:
+        with open(_state_path(run_id), encoding="utf-8") as f:
+            state = json.load(f)
+    except (OSError, ValueError):
+        return None
+    state["completed"] = len(state.get("completed", []))
+    return state
+
+
+def main():
+    from database import SessionLocal
+
+    parser = argparse.ArgumentParser(description="Generate every active employee's salary slip as one ZIP")
+    parser.add_argument("period", help="pay period, YYYY-MM")
+    parser.add_argument("--out", default=None)
+    parser.add_argument("--run-id", default=None)
+    parser.add_argument("--workers", type=int, default=PAYROLL_WORKERS)
+    args = parser.parse_args()
+
+    try:
+        run = start_run(args.period, args.run_id)
+    except (ValueError, RunInProgress) as e:
+        parser.error(f"run already in progress: {e}" if isinstance(e, RunInProgress) else str(e))
+    out = args.out or f"salary_slips_{args.period}.zip"
+    pool = RenderPool(args.workers)
+    try:
+        with open(out, "wb") as f:
+            for chunk in run.stream_zip(SessionLocal, render_pool=pool):
+                f.write(chunk)
+                p = run.progress()
+                print(f"\r{p['done']}/{p['total']} slips", end="", flush=True)
+    finally:
+        pool.shutdown()
+
+    print()
+    print(json.dumps(run.progress(), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,148 @@
+import json
+import os
+import threading
+import time
+from collections import OrderedDict
+from models import User
+from services.tiered_cache import REDIS_RETRY_SECONDS
+
+PRINCIPAL_CACHE_SIZE = int(os.getenv("PRINCIPAL_CACHE_SIZE", "10000"))
+PRINCIPAL_CACHE_TTL = int(os.getenv("PRINCIPAL_CACHE_TTL", "60"))
+PRINCIPAL_CACHE_REDIS = os.getenv("PRINCIPAL_CACHE_REDIS", "1") == "1"
+REDIS_PREFIX = "emp_cache:principal:"
+INVALIDATION_KIND = "principal"
+
+
+class Principal:
+    """The few fields of the logged-in user that middleware, templates and role checks read."""
+
+    __slots__ = ("id", "email", "full_name", "role", "status")
+
+    def __init__(self, id, email, full_name, role, status):
+        self.id = id
+        self.email = email
+        self.full_name = full_name
+        self.role = role
+        self.status = status
+
+    @classmethod
+    def from_user(cls, user):
+        role = user.role.value if hasattr(user.role, "value") else user.role
+        return cls(user.id, user.email, user.full_name, role, user.status)
+
+    def to_dict(self):
+        return {name: getattr(self, name) for name in self.__slots__}
+
+
+class PrincipalCache:
+    """Per-process LRU of principals, optionally backed by Redis.
+
+    With a TieredBackend attached, invalidations are broadcast on its channel
+    and the local copies are only trusted while its listener is connected, so
+    a deactivated user is never served from another worker's memory.
+    """
+
+    def __init__(self, max_size=PRINCIPAL_CACHE_SIZE, ttl=PRINCIPAL_CACHE_TTL):
+        self.max_size = max_size
+        self.ttl = ttl
+        self.redis = None
+        self.backend = None
+        self._redis_down_until = 0.0
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # user_id -> (expires_at, Principal)
+
+    def attach(self, redis, backend):
+        self.redis = redis
+        self.backend = backend
+        backend.subscribe(INVALIDATION_KIND, self._on_invalidate)
+
+    def _on_invalidate(self, target):
+        if target is None:
+            self.clear()
+        else:
+            self._drop(int(target))
+
+    def _local_trusted(self):
+        return self.backend is None or self.backend.listening
+
+    def _redis_available(self):
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e):
+        if self._redis_down_until <= time.monotonic():
+            print(f"⚠️ Redis principal cache unavailable, falling back to the database: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    def get(self, user_id):
+        if not self._local_trusted():
+            return None
+        with self._lock:
+            entry = self._entries.get(user_id)
+            if entry is None:
+                return None
+            if entry[0] < time.monotonic():
+                del self._entries[user_id]
+                return None
+            self._entries.move_to_end(user_id)
+            return entry[1]
+
+    def set(self, principal):
+        with self._lock:
+            self._entries[principal.id] = (time.monotonic() + self.ttl, principal)
+            self._entries.move_to_end(principal.id)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def load(self, db, user_id):
+        principal = self.get(user_id)
+        if principal is None:
+            user = db.query(User).filter(User.id == user_id).first()
+            if not user:
+                return None
+            principal = Principal.from_user(user)
+            self.set(principal)
+        return principal
+
+    def _drop(self, user_id):
+        with self._lock:
+            self._entries.pop(user_id, None)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    async def aget(self, user_id):
+        principal = self.get(user_id)
+        if principal is not None or not self._redis_available():
+            return principal
+        try:
+            cached = await self.redis.get(f"{REDIS_PREFIX}{user_id}")
+        except Exception as e:
+            self._redis_failed(e)
+            return None
+        if not cached:
+            return None
+        principal = Principal(**json.loads(cached))
+        self.set(principal)
+        return principal
+
+    async def aset(self, principal):
+        self.set(principal)
+        if self._redis_available():
+            try:
+                await self.redis.set(f"{REDIS_PREFIX}{principal.id}", json.dumps(principal.to_dict()), ex=self.ttl)
+            except Exception as e:
+                self._redis_failed(e)
+
+    async def invalidate(self, user_id):
+        self._drop(user_id)
+        if self._redis_available():
+            try:
+                await self.redis.delete(f"{REDIS_PREFIX}{user_id}")
+            except Exception as e:
+                self._redis_failed(e)
+        if self.backend is not None:
+            await self.backend.publish(INVALIDATION_KIND, user_id)
+
+
+principal_cache = PrincipalCache()
@@ -0,0 +1,175 @@
+import asyncio
+import json
+import os
+import random
+import urllib.request
+from datetime import date, datetime, timedelta
+from bs4 import BeautifulSoup
+
+QUOTE_SOURCE = os.getenv("QUOTE_SOURCE", "http")  # "http" or "file"
+QUOTE_URL = os.getenv("QUOTE_URL", "https://quotes.toscrape.com/")
+QUOTE_FILE = os.getenv("QUOTE_FILE", "quotes.json")
+QUOTE_CACHE_PATH = os.getenv("QUOTE_CACHE_PATH", ".cache/daily_quote.json")
+QUOTE_FETCH_TIMEOUT = float(os.getenv("QUOTE_FETCH_TIMEOUT", "5"))
+QUOTE_RETRY_SECONDS = 15 * 60
+REDIS_KEY = "emp_cache:daily_quote"
+
+FALLBACK_QUOTES = [
+    ("The only way to do great work is to love what you do.", "Steve Jobs"),
+    ("Alone we can do so little; together we can do so much.", "Helen Keller"),
+    ("Quality is not an act, it is a habit.", "Aristotle"),
+    ("It always seems impossible until it's done.", "Nelson Mandela"),
+    ("The secret of getting ahead is getting started.", "Mark Twain"),
+    ("Well done is better than well said.", "Benjamin Franklin"),
+    ("Coming together is a beginning, staying together is progress, and working together is success.", "Henry Ford"),
+]
+
+
+class HttpQuoteFetcher:
+    def __init__(self, url=QUOTE_URL, timeout=QUOTE_FETCH_TIMEOUT):
+        self.url = url
+        self.timeout = timeout
+
+    def fetch(self):
+        req = urllib.request.Request(self.url, headers={"User-Agent": "emp-mgmt/1.0"})
+        with urllib.request.urlopen(req, timeout=self.timeout) as resp:
+            html = resp.read()
+
+        soup = BeautifulSoup(html, "html.parser")
+        quote = soup.find(class_="text")
+        author = soup.find(class_="author")
+        if not quote or not author:
+            raise ValueError(f"No quote found at {self.url}")
+        return quote.get_text(strip=True), author.get_text(strip=True)
+
+
+class FileQuoteFetcher:
+    """Reads a JSON list of {"quote": ..., "author": ...} and picks one per day."""
+
+    def __init__(self, path=QUOTE_FILE):
+        self.path = path
+
+    def fetch(self):
+        with open(self.path, encoding="utf-8") as f:
+            entries = json.load(f)
+        if not entries:
+            raise ValueError(f"{self.path} has no quotes")
+        entry = entries[date.today().toordinal() % len(entries)]
+        return entry["quote"], entry["author"]
+
+
+def default_fetcher():
+    if QUOTE_SOURCE == "file":
+        return FileQuoteFetcher()
+    return HttpQuoteFetcher()
+
+
+def _seconds_until_tomorrow():
+    now = datetime.now()
+    tomorrow = datetime.combine(now.date() + timedelta(days=1), datetime.min.time())
+    return max(int((tomorrow - now).total_seconds()), 60)
+
+
+class QuoteProvider:
+    """Serves the dashboard quote from memory; refreshed by a background task.
+
+    Lookup order on refresh: Redis, on-disk cache, fetcher. The bundled
+    fallback list is used until the first successful refresh.
+    """
+
+    def __init__(self, fetcher=None, cache_path=QUOTE_CACHE_PATH):
+        self.fetcher = fetcher or default_fetcher()
+        self.cache_path = cache_path
+        self.redis = None
+        self._task = None
+        self._day = None
+        self._quote = random.Random(date.today().toordinal()).choice(FALLBACK_QUOTES)
+
+    def current(self):
+        return self._quote
+
+    def _load_disk(self, today):
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if cached.get("day") != today:
+            return None
+        return cached["quote"], cached["author"]
+
+    def _save_disk(self, today, quote):
+        os.makedirs(os.path.dirname(self.cache_path) or ".", exist_ok=True)
+        tmp_path = f"{self.cache_path}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"day": today, "quote": quote[0], "author": quote[1]}, f)
+        os.replace(tmp_path, self.cache_path)
+
+    async def refresh(self):
+        today = date.today().isoformat()
+        if self._day == today:
+            return True
+
+        quote = None
+        if self.redis is not None:
+            try:
+                cached = await self.redis.get(REDIS_KEY)
+                if cached:
+                    cached = json.loads(cached)
+                    if cached.get("day") == today:
+                        quote = cached["quote"], cached["author"]
+            except Exception as e:
+                print(f"⚠️ Quote cache (redis) unavailable: {e}")
+
+        if quote is None:
+            quote = self._load_disk(today)
+
+        if quote is None:
+            try:
+                quote = await asyncio.to_thread(self.fetcher.fetch)
+            except Exception as e:
+                print(f"⚠️ Daily quote fetch failed: {e}")
+                return False
+            try:
+                self._save_disk(today, quote)
+            except OSError as e:
+                print(f"⚠️ Quote cache (disk) not written: {e}")
+            if self.redis is not None:
+                try:
+                    await self.redis.set(
+                        REDIS_KEY,
+                        json.dumps({"day": today, "quote": quote[0], "author": quote[1]}),
+                        ex=_seconds_until_tomorrow()
+                    )
+                except Exception as e:
+                    print(f"⚠️ Quote cache (redis) unavailable: {e}")
+
+        self._quote = quote
+        self._day = today
+        return True
+
+    async def _run(self):
+        while True:
+            ok = await self.refresh()
+            await asyncio.sleep(_seconds_until_tomorrow() if ok else QUOTE_RETRY_SECONDS)
+
+    def start(self, redis=None):
+        self.redis = redis
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+
+quote_provider = QuoteProvider()
+
+
+def get_daily_quote():
+    return quote_provider.current()
@@ -0,0 +1,176 @@
+import bisect
+import heapq
+import sys
+import threading
+import time
+from collections import defaultdict
+from models import User, Employee
+
+INDEXED_FIELDS = ("full_name", "email", "department", "designation")
+# short queries stop scanning the token list after limit * this many users
+SHORT_QUERY_CANDIDATES = 5
+
+
+def _normalize(text):
+    return " ".join((text or "").lower().split())
+
+
+def _tokens(text):
+    # split emails too, so "priya" matches "priya.k@corp.com"
+    for sep in "@._-":
+        text = text.replace(sep, " ")
+    return set(text.split())
+
+
+def _trigrams(text):
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class DirectoryIndex:
+    """In-process typeahead index over users and their employee records.
+
+    Short queries (< 3 chars) are answered by a bisect over the sorted token
+    list, stopping once enough users are found; longer ones intersect trigram
+    posting sets and verify the substring.
+    """
+
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._clear()
+        self.last_rebuild_seconds = None
+        self.last_rebuild_at = None
+
+    def _clear(self):
+        self.docs = {}
+        self.trigrams = defaultdict(set)
+        self.tokens = []  # sorted (token, user_id)
+
+    def rebuild(self, db):
+        started = time.perf_counter()
+        rows = db.query(User, Employee).outerjoin(Employee, Employee.user_id == User.id).all()
+        with self._lock:
+            self._clear()
+            for user, emp in rows:
+                self._add(user.id, self._doc(user, emp), sort=False)
+            self.tokens.sort()
+        self.last_rebuild_seconds = time.perf_counter() - started
+        self.last_rebuild_at = time.time()
+
+    def upsert(self, user, employee=None):
+        with self._lock:
+            current = self.docs.get(user.id)
+            doc = self._doc(user, employee)
+            # keep employee fields when only the user row changed
+            if employee is None and current is not None:
+                for field in ("employee_id", "department", "designation"):
+                    doc[field] = current[field]
+            if current is not None:
+                self._remove(user.id)
+            self._add(user.id, doc)
+
+    def remove(self, user_id):
+        with self._lock:
+            if user_id in self.docs:
+                self._remove(user_id)
+
+    def _doc(self, user, emp):
+        return {
+            "user_id": user.id,
+            "employee_id": emp.id if emp else None,
+            "full_name": user.full_name,
+            "email": user.email,
+            "role": user.role.value if hasattr(user.role, "value") else user.role,
+            "department": emp.department if emp else None,
+            "designation": emp.designation if emp else None,
+        }
+
+    def _text(self, doc):
+        return _normalize(" ".join(doc[f] or "" for f in INDEXED_FIELDS))
+
+    def _add(self, user_id, doc, sort=True):
+        self.docs[user_id] = doc
+        text = self._text(doc)
+        doc["_text"] = text
+        doc["_name"] = (doc["full_name"] or "").lower()
+        for gram in _trigrams(text):
+            self.trigrams[gram].add(user_id)
+        for token in _tokens(text):
+            if sort:
+                bisect.insort(self.tokens, (token, user_id))
+            else:
+                # rebuild appends everything and sorts once
+                self.tokens.append((token, user_id))
+
+    def _remove(self, user_id):
+        doc = self.docs.pop(user_id)
+        text = doc["_text"]
+        for gram in _trigrams(text):
+            postings = self.trigrams.get(gram)
+            if postings is not None:
+                postings.discard(user_id)
+                if not postings:
+                    del self.trigrams[gram]
+        for token in _tokens(text):
+            i = bisect.bisect_left(self.tokens, (token, user_id))
+            if i < len(self.tokens) and self.tokens[i] == (token, user_id):
+                del self.tokens[i]
+
+    def search(self, query, limit=10):
+        q = _normalize(query)
+        if not q:
+            return []
+
+        with self._lock:
+            if len(q) < 3:
+                ids = set()
+                wanted = limit * SHORT_QUERY_CANDIDATES
+                i = bisect.bisect_left(self.tokens, (q,))
+                while i < len(self.tokens) and len(ids) < wanted:
+                    token, uid = self.tokens[i]
+                    if not token.startswith(q):
+                        break
+                    ids.add(uid)
+                    i += 1
+            else:
+                grams = sorted({q[i:i + 3] for i in range(len(q) - 2)}, key=lambda g: len(self.trigrams.get(g, ())))
+                candidates = None
+                for gram in grams:
+                    postings = self.trigrams.get(gram)
+                    if not postings:
+                        return []
+                    candidates = postings if candidates is None else candidates & postings
+                    if not candidates:
+                        return []
+                ids = [uid for uid in candidates if q in self.docs[uid]["_text"]]
+
+            # names that start with the query rank first, then alphabetical
+            docs = heapq.nsmallest(
+                limit,
+                (self.docs[uid] for uid in ids),
+                key=lambda d: (not d["_name"].startswith(q), d["_name"]),
+            )
+
+        return [{k: v for k, v in d.items() if not k.startswith("_")} for d in docs]
+
+    def stats(self):
+        with self._lock:
+            approx_bytes = (
+                sys.getsizeof(self.docs)
+                + sum(sys.getsizeof(d) + sum(sys.getsizeof(v) for v in d.values()) for d in self.docs.values())
+                + sys.getsizeof(self.trigrams)
+                + sum(sys.getsizeof(g) + sys.getsizeof(p) for g, p in self.trigrams.items())
+                + sys.getsizeof(self.tokens)
+                + sum(sys.getsizeof(t) for t in self.tokens)
+            )
+            return {
+                "documents": len(self.docs),
+                "trigrams": len(self.trigrams),
+                "tokens": len(self.tokens),
+                "approx_bytes": approx_bytes,
+                "last_rebuild_seconds": self.last_rebuild_seconds,
+                "last_rebuild_at": self.last_rebuild_at,
+            }
+
+
+directory_index = DirectoryIndex()
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import os
+import threading
+import uuid
+
+SLIP_CACHE_DIR = os.getenv("SLIP_CACHE_DIR", ".cache/salary_slips")
+SLIP_CACHE_MAX_BYTES = int(os.getenv("SLIP_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+
+def slip_cache_key(employee, user, rules_version, period):
+    payload = {
+        "employee_id": employee.id,
+        "full_name": user.full_name,
+        "department": employee.department,
+        "designation": employee.designation,
+        "salary": str(employee.salary),
+        "rules_version": rules_version,
+        "period": period,
+    }
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode()).hexdigest()
+
+
+class SlipCache:
+    """Content-addressed PDF store on disk; least recently served files are evicted first."""
+
+    def __init__(self, directory=SLIP_CACHE_DIR, max_bytes=SLIP_CACHE_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._size = None
+        self.hits = 0
+        self.misses = 0
+
+    def path(self, key):
+        return os.path.join(self.directory, f"{key}.pdf")
+
+    def _scan(self):
+        os.makedirs(self.directory, exist_ok=True)
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(".pdf"):
+                st = entry.stat()
+                entries.append((st.st_mtime, st.st_size, entry.path))
+        return entries
+
+    def get(self, key):
+        path = self.path(key)
+        try:
+            # mtime doubles as the LRU clock
+            os.utime(path)
+        except FileNotFoundError:
+            self.misses += 1
+            return None
+        self.hits += 1
+        return path
+
+    def put(self, key, data):
+        os.makedirs(self.directory, exist_ok=True)
+        path = self.path(key)
+        tmp_path = f"{path}.{uuid.uuid4().hex}.tmp"
+        with open(tmp_path, "wb") as f:
+            f.write(data)
+        os.replace(tmp_path, path)
+
+        with self._lock:
+            if self._size is None:
+                self._size = sum(size for _, size, _ in self._scan())
+            else:
+                self._size += len(data)
+            if self._size > self.max_bytes:
+                self._evict()
+        return path
+
+    def _evict(self):
+        entries = sorted(self._scan())
+        self._size = sum(size for _, size, _ in entries)
+        # drop down to 90% so eviction does not run on every write
+        target = self.max_bytes * 0.9
+        for _, size, path in entries:
+            if self._size <= target:
+                break
+            try:
+                os.remove(path)
+                self._size -= size
+            except FileNotFoundError:
+                pass
+
+    def stats(self):
+        return {"hits": self.hits, "misses": self.misses, "bytes": self._size, "max_bytes": self.max_bytes}
+
+
+slip_cache = SlipCache()
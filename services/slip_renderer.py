@@ -0,0 +1,102 @@
+from io import BytesIO
+from reportlab.lib import colors
+from reportlab.lib.pagesizes import A4
+from reportlab.pdfgen import canvas
+from utils import money
+
+# ---------- Static layout, computed once ----------
+PAGE_WIDTH, PAGE_HEIGHT = A4
+MARGIN = 40
+FRAME_WIDTH = PAGE_WIDTH - 2 * MARGIN
+FONT = "Helvetica"
+FONT_BOLD = "Helvetica-Bold"
+FONT_SIZE = 10
+ROW_HEIGHT = 18
+PADDING = 6
+
+TITLE_Y = PAGE_HEIGHT - MARGIN - 30
+
+INFO_COLS = (120, 300)
+INFO_X = MARGIN + (FRAME_WIDTH - sum(INFO_COLS)) / 2
+INFO_TOP = TITLE_Y - 30
+INFO_LABELS = ("Employee Name:", "Employee ID:", "Department:", "Designation:", "Gross Salary:")
+
+GRID_COLS = (120, 120, 120, 120)
+GRID_X = [MARGIN + (FRAME_WIDTH - sum(GRID_COLS)) / 2]
+for _w in GRID_COLS:
+    GRID_X.append(GRID_X[-1] + _w)
+GRID_TOP = INFO_TOP - len(INFO_LABELS) * ROW_HEIGHT - 20
+GRID_ROWS = 6
+GRID_Y = [GRID_TOP - i * ROW_HEIGHT for i in range(GRID_ROWS + 1)]
+
+# (row, col, text) for every fixed cell of the earnings/deductions grid
+GRID_LABELS = (
+    (0, 0, "Earnings"), (0, 1, "Amount"), (0, 2, "Deductions"), (0, 3, "Amount"),
+    (1, 0, "Basic"), (1, 2, "PF"),
+    (2, 0, "HRA"), (2, 2, "Professional Tax"),
+    (3, 0, "Special Allowance"),
+    (4, 0, "Total Earnings"), (4, 2, "Total Deductions"),
+    (5, 0, "Net Salary"),
+)
+# (row, col, breakup key) for the per-employee amounts
+GRID_VALUES = (
+    (1, 1, "basic"), (1, 3, "pf"),
+    (2, 1, "hra"), (2, 3, "pt"),
+    (3, 1, "special"),
+    (4, 1, "total_earnings"), (4, 3, "total_deductions"),
+    (5, 1, "net_salary"),
+)
+
+
+def _cell_baseline(row, top):
+    return top - row * ROW_HEIGHT - ROW_HEIGHT + PADDING
+
+
+def _draw_static(c):
+    c.setFont(FONT_BOLD, 18)
+    c.drawCentredString(PAGE_WIDTH / 2, TITLE_Y, "Salary Slip")
+
+    c.setFont(FONT, FONT_SIZE)
+    for i, label in enumerate(INFO_LABELS):
+        c.drawString(INFO_X + PADDING, _cell_baseline(i, INFO_TOP), label)
+
+    c.setFillColor(colors.lightgrey)
+    c.rect(GRID_X[0], GRID_Y[1], GRID_X[-1] - GRID_X[0], ROW_HEIGHT, stroke=0, fill=1)
+    c.setFillColor(colors.black)
+
+    c.setStrokeColor(colors.grey)
+    c.setLineWidth(0.5)
+    for y in GRID_Y:
+        c.line(GRID_X[0], y, GRID_X[-1], y)
+    for x in GRID_X:
+        c.line(x, GRID_Y[-1], x, GRID_Y[0])
+
+    for row, col, text in GRID_LABELS:
+        c.drawString(GRID_X[col] + PADDING, _cell_baseline(row, GRID_TOP), text)
+
+
+def render_salary_slip(employee, user, breakup):
+    buffer = BytesIO()
+    c = canvas.Canvas(buffer, pagesize=A4, pageCompression=1)
+    c.setTitle("Salary Slip")
+
+    _draw_static(c)
+
+    values = (
+        user.full_name,
+        str(employee.id),
+        employee.department or "",
+        employee.designation or "",
+        money(employee.salary),
+    )
+    value_x = INFO_X + INFO_COLS[0] + PADDING
+    for i, value in enumerate(values):
+        c.drawString(value_x, _cell_baseline(i, INFO_TOP), value)
+
+    for row, col, key in GRID_VALUES:
+        c.drawString(GRID_X[col] + PADDING, _cell_baseline(row, GRID_TOP), money(breakup[key]))
+
+    c.showPage()
+    c.save()
+    buffer.seek(0)
+    return buffer
@@ -0,0 +1,141 @@
+import os
+import re
+import threading
+import time
+from collections import Counter
+from contextlib import contextmanager
+from contextvars import ContextVar
+from sqlalchemy import event
+
+N_PLUS_ONE_THRESHOLD = int(os.getenv("SQL_N_PLUS_ONE_THRESHOLD", "3"))
+# when set, a request issuing more queries than this fails (meant for test runs)
+SQL_QUERY_BUDGET = int(os.getenv("SQL_QUERY_BUDGET", "0")) or None
+
+_current = ContextVar("sql_request_stats", default=None)
+
+
+class QueryBudgetExceeded(AssertionError):
+    pass
+
+
+def statement_shape(statement):
+    shape = re.sub(r"'(?:[^']|'')*'", "?", statement)
+    shape = re.sub(r"\b\d+\b", "?", shape)
+    shape = re.sub(r"\(\s*(?:\?|%\(\w+\)s|\$\d+)(?:\s*,\s*(?:\?|%\(\w+\)s|\$\d+))*\s*\)", "(?)", shape)
+    return " ".join(shape.split())
+
+
+class RequestQueryStats:
+    def __init__(self):
+        self.count = 0
+        self.total_seconds = 0.0
+        self.slowest_seconds = 0.0
+        self.slowest_statement = None
+        self.shapes = Counter()
+
+    def record(self, statement, seconds):
+        self.count += 1
+        self.total_seconds += seconds
+        self.shapes[statement_shape(statement)] += 1
+        if seconds > self.slowest_seconds:
+            self.slowest_seconds = seconds
+            self.slowest_statement = statement
+
+    def repeated_shapes(self):
+        return {shape: n for shape, n in self.shapes.items() if n >= N_PLUS_ONE_THRESHOLD}
+
+    def headers(self):
+        return {
+            "X-DB-Query-Count": str(self.count),
+            "X-DB-Time-Ms": f"{self.total_seconds * 1000:.2f}",
+            "X-DB-Slowest-Ms": f"{self.slowest_seconds * 1000:.2f}",
+            "X-DB-N-Plus-One": str(len(self.repeated_shapes())),
+        }
+
+
+class SqlMetrics:
+    """Process-wide aggregates per route, fed by finished requests."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.routes = {}
+
+    def add(self, route, stats):
+        with self._lock:
+            entry = self.routes.setdefault(route, {
+                "requests": 0,
+                "queries": 0,
+                "sql_ms": 0.0,
+                "max_queries": 0,
+                "slowest_ms": 0.0,
+                "slowest_statement": None,
+                "n_plus_one_requests": 0,
+                "n_plus_one_shapes": {},
+            })
+            entry["requests"] += 1
+            entry["queries"] += stats.count
+            entry["sql_ms"] += stats.total_seconds * 1000
+            entry["max_queries"] = max(entry["max_queries"], stats.count)
+            if stats.slowest_seconds * 1000 > entry["slowest_ms"]:
+                entry["slowest_ms"] = stats.slowest_seconds * 1000
+                entry["slowest_statement"] = stats.slowest_statement
+            repeated = stats.repeated_shapes()
+            if repeated:
+                entry["n_plus_one_requests"] += 1
+                entry["n_plus_one_shapes"].update(repeated)
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                route: {
+                    **entry,
+                    "sql_ms": round(entry["sql_ms"], 2),
+                    "slowest_ms": round(entry["slowest_ms"], 2),
+                    "avg_queries": round(entry["queries"] / entry["requests"], 2),
+                    "n_plus_one_shapes": dict(entry["n_plus_one_shapes"]),
+                }
+                for route, entry in self.routes.items()
+            }
+
+
+sql_metrics = SqlMetrics()
+
+
+def _before_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    # kept on the execution context, not the pooled connection: a statement that
+    # fails never reaches after_cursor_execute and must not skew later timings
+    if context is not None:
+        context._query_start_time = time.perf_counter()
+
+
+def _after_cursor_execute(conn, cursor, statement, parameters, context, executemany):
+    started = getattr(context, "_query_start_time", None)
+    stats = _current.get()
+    if stats is not None and started is not None:
+        stats.record(statement, time.perf_counter() - started)
+
+
+def instrument(engine):
+    event.listen(engine, "before_cursor_execute", _before_cursor_execute)
+    event.listen(engine, "after_cursor_execute", _after_cursor_execute)
+
+
+def start_request():
+    stats = RequestQueryStats()
+    return stats, _current.set(stats)
+
+
+def end_request(token):
+    _current.reset(token)
+
+
+@contextmanager
+def query_budget(max_queries):
+    """Fails the block if it issues more than max_queries statements, e.g. in tests."""
+    stats, token = start_request()
+    try:
+        yield stats
+    finally:
+        end_request(token)
+    if stats.count > max_queries:
+        raise QueryBudgetExceeded(f"{stats.count} queries issued, budget is {max_queries}: {dict(stats.shapes)}")
@@ -0,0 +1,267 @@
+import argparse
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+from fastapi.responses import FileResponse, Response
+from fastapi.staticfiles import StaticFiles
+from services.file_delivery import etag_matches
+
+try:
+    import brotli  # build step only; without it just the gzip variants are written
+except ImportError:
+    brotli = None
+
+STATIC_DIR = "static"
+STATIC_URL = "/static"
+BUILD_DIR = "build"  # relative to STATIC_DIR, so the /static mount serves it
+MANIFEST_NAME = "manifest.json"
+SKIP_DIRS = {"uploads", BUILD_DIR}
+COMPRESSIBLE = {".css", ".js", ".svg", ".json", ".map", ".txt", ".ttf", ".eot", ".html"}
+IMMUTABLE = "public, max-age=31536000, immutable"
+# preference order when the client accepts several
+ENCODINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_CSS_URL = re.compile(r"""url\(\s*(['"]?)([^'")]+)\1\s*\)""")
+_CSS_COMMENT = re.compile(r"/\*.*?\*/", re.S)
+# string literals in JS naming another asset: "/static/js/x.js", or STATIC_URL + "js/x.js"
+# as the dashboard script builds its plugin URLs
+_JS_STATIC_URL = re.compile(r"""(["'])%s/([^"'\s]+)\1""" % re.escape(STATIC_URL))
+_JS_PREFIXED = re.compile(r"""(\bSTATIC_URL\s*\+\s*)(["'])([^"'\s]+)\2""")
+
+
+def _fingerprint(logical, digest):
+    base, ext = posixpath.splitext(logical)
+    return f"{base}.{digest[:12]}{ext}"
+
+
+def minify_css(css):
+    # conservative: comments and whitespace only
+    css = _CSS_COMMENT.sub("", css)
+    css = re.sub(r"\s+", " ", css)
+    return re.sub(r"\s*([{};])\s*", r"\1", css).strip()
+
+
+def _rewrite_css_urls(css, logical, manifest):
+    def replace(match):
+        quote, url = match.groups()
+        if url.startswith(("data:", "http:", "https:", "//", "#")):
+            return match.group(0)
+        path, suffix = re.match(r"([^?#]*)(.*)", url).groups()
+        if path.startswith(STATIC_URL + "/"):
+            target = path[len(STATIC_URL) + 1:]
+        else:
+            target = posixpath.normpath(posixpath.join(posixpath.dirname(logical), path))
+        entry = manifest.get(target)
+        if entry is None:
+            return match.group(0)
+        return f"url({quote}{STATIC_URL}/{BUILD_DIR}/{entry['path']}{suffix}{quote})"
+    return _CSS_URL.sub(replace, css)
+
+
+def _js_references(js):
+    return {m.group(2) for m in _JS_STATIC_URL.finditer(js)} | {m.group(3) for m in _JS_PREFIXED.finditer(js)}
+
+
+def _css_references(css, logical):
+    refs = set()
+    for _, url in _CSS_URL.findall(css):
+        path = re.match(r"([^?#]*)", url).group(1)
+        if path.startswith(STATIC_URL + "/"):
+            refs.add(path[len(STATIC_URL) + 1:])
+        elif not url.startswith(("data:", "http:", "https:", "//", "#")):
+            refs.add(posixpath.normpath(posixpath.join(posixpath.dirname(logical), path)))
+    return refs
+
+
+def _rewrite_js_urls(js, manifest):
+    def absolute(match):
+        quote, target = match.groups()
+        entry = manifest.get(target)
+        if entry is None:
+            return match.group(0)
+        return f"{quote}{STATIC_URL}/{BUILD_DIR}/{entry['path']}{quote}"
+
+    def prefixed(match):
+        prefix, quote, target = match.groups()
+        entry = manifest.get(target)
+        if entry is None:
+            return match.group(0)
+        # the script still prepends its own STATIC_URL ("/static/")
+        return f"{prefix}{quote}{BUILD_DIR}/{entry['path']}{quote}"
+
+    return _JS_PREFIXED.sub(prefixed, _JS_STATIC_URL.sub(absolute, js))
+
+
+def _compress(path, data):
+    encodings = []
+    variants = [("gzip", ".gz", lambda d: gzip.compress(d, compresslevel=9, mtime=0))]
+    if brotli is not None:
+        variants.insert(0, ("br", ".br", lambda d: brotli.compress(d, quality=11)))
+    for encoding, suffix, compress in variants:
+        packed = compress(data)
+        if len(packed) < len(data):
+            with open(path + suffix, "wb") as f:
+                f.write(packed)
+            encodings.append(encoding)
+    return encodings
+
+
+def build(static_dir=STATIC_DIR):
+    """Fingerprint every asset under static_dir into static_dir/build and write the manifest.
+
+    CSS is minified, and asset URLs in CSS and JS are pointed at the
+    fingerprinted files, so an asset is always processed after the ones it
+    references (a reference cycle is left pointing at the unversioned URL).
+    """
+    out_dir = os.path.join(static_dir, BUILD_DIR)
+    shutil.rmtree(out_dir, ignore_errors=True)
+
+    logical_paths = []
+    for root, dirs, files in os.walk(static_dir):
+        rel_root = os.path.relpath(root, static_dir)
+        if rel_root == ".":
+            dirs[:] = [d for d in dirs if d not in SKIP_DIRS]
+        for name in files:
+            logical_paths.append(posixpath.normpath(posixpath.join(rel_root.replace(os.sep, "/"), name)))
+    known = set(logical_paths)
+
+    manifest = {}
+    in_progress = set()
+
+    def process(logical):
+        if logical in manifest or logical in in_progress:
+            return
+        in_progress.add(logical)
+        with open(os.path.join(static_dir, logical), "rb") as f:
+            data = f.read()
+
+        ext = posixpath.splitext(logical)[1].lower()
+        if ext in (".css", ".js"):
+            text = data.decode("utf-8")
+            refs = _css_references(text, logical) if ext == ".css" else _js_references(text)
+            for ref in sorted(refs & known):
+                process(ref)
+            if ext == ".css":
+                text = _rewrite_css_urls(text, logical, manifest)
+                if not logical.endswith(".min.css"):
+                    text = minify_css(text)
+            else:
+                text = _rewrite_js_urls(text, manifest)
+            data = text.encode("utf-8")
+
+        digest = hashlib.sha256(data).hexdigest()
+        fingerprinted = _fingerprint(logical, digest)
+        dest = os.path.join(out_dir, fingerprinted)
+        os.makedirs(os.path.dirname(dest), exist_ok=True)
+        with open(dest, "wb") as f:
+            f.write(data)
+
+        manifest[logical] = {
+            "path": fingerprinted,
+            "sha256": digest,
+            "size": len(data),
+            "encodings": _compress(dest, data) if ext in COMPRESSIBLE else [],
+        }
+        in_progress.discard(logical)
+
+    for logical in sorted(logical_paths):
+        process(logical)
+
+    with open(os.path.join(out_dir, MANIFEST_NAME), "w", encoding="utf-8") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    return manifest
+
+
+def load_manifest(static_dir=STATIC_DIR):
+    try:
+        with open(os.path.join(static_dir, BUILD_DIR, MANIFEST_NAME), encoding="utf-8") as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+manifest = load_manifest()
+_fingerprinted = {entry["path"]: entry for entry in manifest.values()}
+
+
+def asset_url(logical):
+    """URL of an asset under static/; the fingerprinted build when the manifest has it."""
+    entry = manifest.get(logical)
+    if entry is None:
+        return f"{STATIC_URL}/{logical}"
+    return f"{STATIC_URL}/{BUILD_DIR}/{entry['path']}"
+
+
+def accepted_encodings(header):
+    """Content codings the client accepts; anything with q=0 is refused, not accepted."""
+    accepted = set()
+    for item in (header or "").split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if coding and q > 0:
+            accepted.add(coding.lower())
+    return accepted
+
+
+class PrecompressedStaticFiles(StaticFiles):
+    """StaticFiles that serves fingerprinted build files as immutable, picking
+    the .br/.gz variant the client accepts. Everything else is served as before."""
+
+    async def get_response(self, path, scope):
+        prefix = BUILD_DIR + "/"
+        normalized = path.replace(os.sep, "/")
+        entry = _fingerprinted.get(normalized[len(prefix):]) if normalized.startswith(prefix) else None
+        if entry is None:
+            return await super().get_response(path, scope)
+
+        headers = dict((k.decode("latin-1").lower(), v.decode("latin-1")) for k, v in scope["headers"])
+        accepted = accepted_encodings(headers.get("accept-encoding"))
+        full_path = os.path.join(self.directory, normalized)
+        media_type = mimetypes.guess_type(full_path)[0] or "application/octet-stream"
+
+        for encoding, suffix in ENCODINGS:
+            if encoding in entry["encodings"] and encoding in accepted:
+                etag = f'"{entry["sha256"]}-{encoding}"'
+                response_headers = {"ETag": etag, "Cache-Control": IMMUTABLE, "Vary": "Accept-Encoding"}
+                if etag_matches(headers.get("if-none-match"), etag):
+                    return Response(status_code=304, headers=response_headers)
+                return FileResponse(
+                    full_path + suffix,
+                    media_type=media_type,
+                    headers={**response_headers, "Content-Encoding": encoding},
+                )
+
+        etag = f'"{entry["sha256"]}"'
+        response_headers = {"ETag": etag, "Cache-Control": IMMUTABLE}
+        if entry["encodings"]:
+            response_headers["Vary"] = "Accept-Encoding"
+        if etag_matches(headers.get("if-none-match"), etag):
+            return Response(status_code=304, headers=response_headers)
+        return FileResponse(full_path, media_type=media_type, headers=response_headers)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Static asset pipeline")
+    parser.add_argument("command", choices=("build",))
+    parser.add_argument("--static-dir", default=STATIC_DIR)
+    args = parser.parse_args()
+
+    built = build(args.static_dir)
+    compressed = sum(1 for entry in built.values() if entry["encodings"])
+    print(f"fingerprinted {len(built)} assets ({compressed} with compressed variants)")
+
+
+if __name__ == "__main__":
+    main()
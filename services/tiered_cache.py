@@ -0,0 +1,245 @@
+import asyncio
+import os
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from fastapi_cache.backends import Backend
+
+L1_CACHE_SIZE = int(os.getenv("L1_CACHE_SIZE", "5000"))
+L1_CACHE_TTL = int(os.getenv("L1_CACHE_TTL", "30"))
+INVALIDATION_CHANNEL = "emp_cache:invalidate"
+REDIS_RETRY_SECONDS = 30
+
+
+class LocalLRU:
+    def __init__(self, max_size=L1_CACHE_SIZE):
+        self.max_size = max_size
+        self._lock = threading.Lock()
+        self._entries = OrderedDict()  # key -> (expires_at or None, value)
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            expires_at, value = entry
+            if expires_at is not None and expires_at < time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return value
+
+    def ttl(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None:
+            return 0
+        if entry[0] is None:
+            return -1
+        return max(int(entry[0] - time.monotonic()), 0)
+
+    def set(self, key, value, ttl=None):
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl if ttl else None, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_size:
+                self._entries.popitem(last=False)
+
+    def delete(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+    def clear(self, prefix=None):
+        with self._lock:
+            if prefix is None:
+                count = len(self._entries)
+                self._entries.clear()
+                return count
+            keys = [k for k in self._entries if k.startswith(prefix)]
+            for k in keys:
+                del self._entries[k]
+            return len(keys)
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class TieredBackend(Backend):
+    """FastAPICache backend: bounded in-process L1 in front of Redis (L2).
+
+    Writes and clears are published on a Redis channel so other workers drop
+    their L1 copy. If Redis is unreachable the backend keeps serving from L1
+    alone and retries Redis every REDIS_RETRY_SECONDS.
+
+    Other in-process caches can share the channel: subscribe(kind, handler)
+    calls handler(target) for each publish(kind, target) from another worker,
+    and handler(None) whenever messages may have been missed.
+    """
+
+    def __init__(self, redis=None, l1_size=L1_CACHE_SIZE, l1_ttl=L1_CACHE_TTL):
+        self.redis = redis
+        self.l1 = LocalLRU(l1_size)
+        self.l1_ttl = l1_ttl
+        self.node_id = uuid.uuid4().hex
+        self._redis_down_until = 0.0
+        self._listener = None
+        self._handlers = {}
+        self.listening = False
+        self.counters = {"l1_hits": 0, "l1_misses": 0, "l2_hits": 0, "l2_misses": 0, "l2_errors": 0, "invalidations_received": 0}
+
+    # ---------- redis helpers ----------
+    def _redis_available(self):
+        return self.redis is not None and time.monotonic() >= self._redis_down_until
+
+    def _redis_failed(self, e):
+        self.counters["l2_errors"] += 1
+        if self._redis_down_until <= time.monotonic():
+            print(f"⚠️ Redis cache unavailable, serving from local cache only: {e}")
+        self._redis_down_until = time.monotonic() + REDIS_RETRY_SECONDS
+
+    async def _publish(self, message):
+        if not self._redis_available():
+            return
+        try:
+            await self.redis.publish(INVALIDATION_CHANNEL, f"{self.node_id}|{message}")
+        except Exception as e:
+            self._redis_failed(e)
+
+    async def publish(self, kind, target):
+        await self._publish(f"{kind}|{target}")
+
+    def subscribe(self, kind, handler):
+        self._handlers[kind] = handler
+
+    def _reset_subscribers(self):
+        for handler in self._handlers.values():
+            handler(None)
+
+    async def ping(self):
+        if self.redis is None:
+            return False
+        try:
+            await self.redis.ping()
+            return True
+        except Exception as e:
+            self._redis_failed(e)
+            return False
+
+    def _l1_ttl(self, expire):
+        return min(expire, self.l1_ttl) if expire else self.l1_ttl
+
+    # ---------- Backend API ----------
+    async def get_with_ttl(self, key):
+        value = self.l1.get(key)
+        if value is not None:
+            self.counters["l1_hits"] += 1
+            return self.l1.ttl(key), value
+        self.counters["l1_misses"] += 1
+
+        if self._redis_available():
+            try:
+                async with self.redis.pipeline(transaction=False) as pipe:
+                    ttl, value = await pipe.ttl(key).get(key).execute()
+            except Exception as e:
+                self._redis_failed(e)
+            else:
+                if value is not None:
+                    self.counters["l2_hits"] += 1
+                    self.l1.set(key, value, self._l1_ttl(ttl if ttl and ttl > 0 else None))
+                    return ttl, value
+                self.counters["l2_misses"] += 1
+        return 0, None
+
+    async def get(self, key):
+        return (await self.get_with_ttl(key))[1]
+
+    async def set(self, key, value, expire=None):
+        self.l1.set(key, value, self._l1_ttl(expire))
+        if self._redis_available():
+            try:
+                await self.redis.set(key, value, ex=expire)
+            except Exception as e:
+                self._redis_failed(e)
+                return
+        await self._publish(f"key|{key}")
+
+    async def clear(self, namespace=None, key=None):
+        if namespace:
+            count = self.l1.clear(namespace)
+            await self._publish(f"prefix|{namespace}")
+            if self._redis_available():
+                try:
+                    async for k in self.redis.scan_iter(match=f"{namespace}:*"):
+                        await self.redis.delete(k)
+                        count += 1
+                except Exception as e:
+                    self._redis_failed(e)
+            return count
+        if key:
+            self.l1.delete(key)
+            await self._publish(f"key|{key}")
+            if self._redis_available():
+                try:
+                    return await self.redis.delete(key)
+                except Exception as e:
+                    self._redis_failed(e)
+            return 1
+        return 0
+
+    # ---------- cross-worker invalidation ----------
+    async def _listen(self):
+        while True:
+            try:
+                pubsub = self.redis.pubsub()
+                await pubsub.subscribe(INVALIDATION_CHANNEL)
+                # anything published before the subscription took effect was missed
+                self._reset_subscribers()
+                self.listening = True
+                async for message in pubsub.listen():
+                    if message.get("type") != "message":
+                        continue
+                    data = message["data"]
+                    data = data.decode() if isinstance(data, bytes) else data
+                    sender, kind, target = data.split("|", 2)
+                    if sender == self.node_id:
+                        continue
+                    self.counters["invalidations_received"] += 1
+                    if kind in self._handlers:
+                        self._handlers[kind](target)
+                    elif kind == "prefix":
+                        self.l1.clear(target)
+                    else:
+                        self.l1.delete(target)
+            except asyncio.CancelledError:
+                self.listening = False
+                raise
+            except Exception as e:
+                self.listening = False
+                self._redis_failed(e)
+                # entries published while disconnected were missed
+                self.l1.clear()
+                self._reset_subscribers()
+                await asyncio.sleep(REDIS_RETRY_SECONDS)
+
+    def start(self):
+        if self.redis is not None and self._listener is None:
+            self._listener = asyncio.create_task(self._listen())
+
+    async def stop(self):
+        if self._listener is not None:
+            self._listener.cancel()
+            try:
+                await self._listener
+            except asyncio.CancelledError:
+                pass
+            self._listener = None
+
+    def stats(self):
+        return {
+            **self.counters,
+            "l1_entries": len(self.l1),
+            "l1_max_size": self.l1.max_size,
+            "redis_available": self._redis_available(),
+            "listening": self.listening,
+        }
@@ -0,0 +1,72 @@
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+import auth.router as router_module
+import services.bulk_import as bulk_import
+import utils
+from database import get_db
+
+CSV = (
+    "\ufefffull_name,email,dob,dept,designation,mobile,salary,joining_date\r\n"
+    "Priya Raman,Priya@Corp.com,1990-04-12,Engineering,Software Engineer,9876543210,85000.00,2021-04-01\r\n"
+    "\"Iyer, Arjun\",arjun@corp.com,1988-11-02,Sales,Account Manager,9876501234,70000,2019-07-15\r\n"
+    "Missing Salary,sara@corp.com,1992-01-30,Finance,Analyst,9876500000,,2022-02-01\r\n"
+)
+
+
+@pytest.fixture
+def client(monkeypatch):
+    inserted = []
+
+    def fake_insert_chunk(db, chunk, actor_id, request, report):
+        inserted.extend(row for _, row in chunk)
+        report["inserted"] += len(chunk)
+
+    admin = SimpleNamespace(id=1, role="Admin", status="Y")
+    monkeypatch.setattr(utils, "get_current_user", lambda request, db: admin)
+    monkeypatch.setattr(bulk_import, "_insert_chunk", fake_insert_chunk)
+    monkeypatch.setattr(router_module.directory_index, "rebuild", lambda db: None)
+    monkeypatch.setattr(router_module, "bump_tags_from_thread", lambda *tags: None)
+
+    app = FastAPI()
+    app.include_router(router_module.router)
+    app.dependency_overrides[get_db] = lambda: None
+    with TestClient(app) as test_client:
+        test_client.inserted = inserted
+        yield test_client
+
+
+def test_import_csv_upload(client):
+    # the upload arrives as a SpooledTemporaryFile, which io.TextIOWrapper can't wrap on 3.10
+    response = client.post(
+        "/employee/import",
+        files={"upload_file": ("employees.csv", CSV.encode("utf-8"), "text/csv")},
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["processed"] == 3
+    assert report["inserted"] == 2
+    assert [e["row"] for e in report["errors"]] == [4]
+    assert [row["email"] for row in client.inserted] == ["priya@corp.com", "arjun@corp.com"]
+    assert client.inserted[1]["full_name"] == "Iyer, Arjun"
+
+
+def test_import_ndjson_upload(client):
+    body = (
+        '{"full_name": "Meera Nair", "email": "meera@corp.com", "dob": "1991-03-03", "dept": "Support", '
+        '"designation": "Team Lead", "mobile": "9876511111", "salary": "60000", "joining_date": "2020-01-06"}\n'
+        "not json\n"
+    )
+    response = client.post(
+        "/employee/import",
+        files={"upload_file": ("employees.ndjson", body.encode("utf-8"), "application/x-ndjson")},
+    )
+
+    assert response.status_code == 200
+    report = response.json()
+    assert report["inserted"] == 1
+    assert report["errors"][0]["row"] == 2
@@ -1,20 +1,15 @@
 from passlib.context import CryptContext
-from selenium import webdriver
-from selenium.webdriver.common.by import By
-from selenium.webdriver.chrome.service import Service
-from selenium.webdriver.chrome.options import Options
-from webdriver_manager.chrome import ChromeDriverManager
-from models import User, AuditLog
 from fastapi import HTTPException, Request, Depends
 from sqlalchemy.orm import Session
 from database import get_db
+from services.principal_cache import principal_cache
+from services.static_assets import asset_url
 from decimal import Decimal
 from io import BytesIO
 from reportlab.lib.pagesizes import A4
 from reportlab.platypus import SimpleDocTemplate, Paragraph, Spacer, Table, TableStyle
 from reportlab.lib.styles import getSampleStyleSheet
 from reportlab.lib import colors
-from datetime import datetime, timezone
 import os
 from dotenv import load_dotenv
 import openai
@@ -30,40 +25,29 @@ def hash_password(password: str):
 def verify_password(plain_password: str, hashed_password: str):
     return pwd_context.verify(plain_password, hashed_password)
 
+# fingerprinted build URLs once `python -m services.static_assets build` has run
 STATIC_PATHS = {
-    "apple_icon": "/static/img/apple-icon.png",
-    "favicon": "/static/img/favicon.png",
-    "nucleo_icon": "/static/css/nucleo-icons.css",
-    "nucleo_svg": "/static/css/nucleo-svg.css",
-    "tailwind": "/static/css/soft-ui-dashboard-tailwind.css",
-    "scrollbar_min": "/static/js/plugins/perfect-scrollbar.min.js",
-    "tailwind_js": "/static/js/soft-ui-dashboard-tailwind.js"
+    "apple_icon": asset_url("img/apple-icon.png"),
+    "favicon": asset_url("img/favicon.png"),
+    "nucleo_icon": asset_url("css/nucleo-icons.css"),
+    "nucleo_svg": asset_url("css/nucleo-svg.css"),
+    "tailwind": asset_url("css/soft-ui-dashboard-tailwind.css"),
+    "scrollbar_min": asset_url("js/plugins/perfect-scrollbar.min.js"),
+    "tailwind_js": asset_url("js/soft-ui-dashboard-tailwind.js")
 }
 
-def get_daily_quote():
-    options = Options()
-    options.add_argument("--headless")  # optional → run without opening a window
-    options.add_argument("--disable-gpu")
-    options.add_argument("--no-sandbox")
-
-    service = Service(ChromeDriverManager().install())
-    driver = webdriver.Chrome(service=service, options=options)
-
-    driver.get("https://quotes.toscrape.com/")
-
-    quote = driver.find_element(By.CLASS_NAME, "text").text
-    author = driver.find_element(By.CLASS_NAME, "author").text
-
-    driver.quit()
-    return quote, author
-
 def get_current_user(request: Request, db: Session):
     user_id = request.session.get("user_id")
 
     if not user_id:
         return None
 
-    return db.query(User).filter(User.id == user_id).first()
+    # UserRoleMiddleware already resolved the principal for active users
+    principal = getattr(request.state, "current_user", None)
+    if principal is not None and principal.id == user_id:
+        return principal
+
+    return principal_cache.load(db, user_id)
 
 def require_roles(*allowed_roles):
     def role_checker(request: Request, db: Session = Depends(get_db)):
@@ -92,6 +76,9 @@ def money(val):
     return f"₹{val:,.2f}"
 
 # ---------- Salary Breakup Function ----------
+# bump whenever breakup_salary or the slip layout changes; it is part of the slip cache key
+SALARY_RULES_VERSION = 2
+
 def breakup_salary(gross_salary: Decimal):
     basic = gross_salary * Decimal("0.50")
     hra = gross_salary * Decimal("0.20")
@@ -140,20 +127,6 @@ def generate_pdf(employee,user, breakup):
     story.append(Spacer(1, 20))
 
     # Earnings & Deductions
-    earnings = [
-        ["Basic", money(breakup["basic"])],
-        ["HRA", money(breakup["hra"])],
-        ["Special Allowance", money(breakup["special"])],
-        ["Total Earnings", money(breakup["total_earnings"])]
-    ]
-
-    deductions = [
-        ["PF (12% Basic)", money(breakup["pf"])],
-        ["Professional Tax", money(breakup["pt"])],
-        ["Total Deductions", money(breakup["total_deductions"])],
-        ["Net Salary", money(breakup["net_salary"])]
-    ]
-
     t2 = Table([
         ["Earnings", "Amount", "Deductions", "Amount"],
         ["Basic", money(breakup["basic"]), "PF", money(breakup["pf"])],
@@ -175,23 +148,6 @@ def generate_pdf(employee,user, breakup):
     buffer.seek(0)
     return buffer
 
-def create_audit_log(db, user_id, action, module, record_id,old_data=None, new_data=None, request=None):
-
-    log = AuditLog(
-        user_id=user_id,
-        action=action,
-        table_name=module,
-        record_id=record_id,
-        old_data=old_data,
-        new_data=new_data,
-        ip_address=request.client.host if request else None,
-        user_agent=request.headers.get("user-agent") if request else None,
-        created_at=datetime.now(timezone.utc)
-    )
-
-    db.add(log)
-    db.commit()
-
 load_dotenv()
 openai.api_key = os.getenv("OPENAI_API_KEY")
 